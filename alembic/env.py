@@ -3,14 +3,11 @@ from alembic import context
 from sqlalchemy.ext.asyncio import create_async_engine
 from app.models.base import Base
 from app.models.user import *  # Ensure this imports all necessary models
-from app.db import postgres_url
+from app.db import direct_url
+from app.settings import settings
 from app.utilities.logger import logger
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-development = True if os.getenv("ENVIRONMENT") == 'development' else False
+development = True if settings.ENVIRONMENT == 'development' else False
 
 target_metadata = Base.metadata
 
@@ -31,7 +28,8 @@ def run_migrations(connection):
 
 async def run_migrations_online():
     """Run migrations in 'online' mode."""
-    connectable = create_async_engine(postgres_url)
+    # direct connection: PgBouncer transaction pooling breaks the autocommit blocks of concurrent index builds
+    connectable = create_async_engine(direct_url)
 
     async with connectable.connect() as connection:
         await connection.run_sync(run_migrations)
@@ -40,11 +38,19 @@ async def run_migrations_online():
 
 
 def main():
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        # in-process run from app.run_migration, on a connection holding the migration lock
+        run_migrations(connection)
+        return
+
     try:
         asyncio.run(run_migrations_online())
     except Exception:
         logger.error("Error running migrations", exc_info=True)
 
 
-if not development:
+# an in-process run from app.run_migration was asked for explicitly (the lifespan itself skips
+# migrations in development), so only the alembic CLI is left to developers
+if not development or context.config.attributes.get("connection") is not None:
     main()
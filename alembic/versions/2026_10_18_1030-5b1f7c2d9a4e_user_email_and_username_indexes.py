@@ -0,0 +1,51 @@
+"""user email and username indexes
+
+Revision ID: 5b1f7c2d9a4e
+Revises: e0c0bb7209c9
+Create Date: 2026-10-18 10:30:12.418653
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f7c2d9a4e'
+down_revision = 'e0c0bb7209c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # emails used to be unique only case-sensitively, so rows differing in case would make the
+    # concurrent unique build fail and leave an INVALID index behind
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT lower(email) FROM "user" GROUP BY lower(email) HAVING count(*) > 1 ORDER BY 1 LIMIT 20'
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "Cannot create the unique index ix_user_lower_email: these emails belong to more than one user "
+            "when compared case-insensitively: " + ", ".join(duplicates) + ". Merge or rename those users and "
+            "run the migration again."
+        )
+
+    # built concurrently so the user table stays writable while the indexes are created
+    with op.get_context().autocommit_block():
+        # drop what an interrupted earlier build left behind, CREATE INDEX would fail on it
+        invalid = op.get_bind().execute(sa.text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid AND c.relname IN ('ix_user_lower_email', 'ix_user_username')"
+        )).scalars().all()
+        for index_name in invalid:
+            op.drop_index(index_name, table_name='user', postgresql_concurrently=True)
+
+        op.create_index(
+            'ix_user_lower_email', 'user', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True
+        )
+        op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_user_username'), table_name='user', postgresql_concurrently=True)
+        op.drop_index('ix_user_lower_email', table_name='user', postgresql_concurrently=True)
@@ -1,3 +1,6 @@
+import argparse
+import os
+
 # FastAPI packages
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,17 +11,17 @@ import uvicorn
 
 # local imports
 from app.routers.api_router import api_router
-# from app.settings import settings
-from app.exception import application_level_error
-
-# for alembic migration
-from .run_migration import run_migration
+from app.settings import settings
+from app.exception import ApplicationErrorMiddleware
+from app.lifespan import lifespan
 
-app = FastAPI(title="Template Backend.", version="0.1.0")
+app = FastAPI(title="Template Backend.", version="0.1.0", lifespan=lifespan)
 origins = ["http://localhost:5173"]
+if settings.FRONTEND_URL:
+    origins.append(settings.FRONTEND_URL)
 
-# Add application-level error handler middleware
-app.middleware('http')(application_level_error)
+# Add application-level error handler middleware; CORS, added after it, stays outermost
+app.add_middleware(ApplicationErrorMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -34,20 +37,54 @@ app.include_router(api_router)
 # Mount the static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Run migrations before starting the app
-run_migration()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app", description="Run the API server.")
+    parser.add_argument("command", nargs="?", default="run", choices=["run"])
+    parser.add_argument(
+        "--mode",
+        choices=["development", "production"],
+        default="development" if settings.ENVIRONMENT == "development" else "production",
+        help="development reloads on code changes; defaults to production unless ENVIRONMENT=development",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or os.cpu_count() or 1,
+        help="worker processes in production mode (default: SERVER_WORKERS, else the CPU count)",
+    )
+    return parser.parse_args()
+
 
 # Entry point for running the application
 if __name__ == "__main__":
-    uvicorn.run(
-        app="app.__main__:app",
-        # ssl_certfile=join(PATH, "cert", "server.crt"),
-        # ssl_keyfile=join(PATH, "cert", "server.key"),
-        loop="asyncio",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        env_file="../.env",
-        # reload_dirs=["../"],
-        # reload_includes=["../static", "../templates"],
-    )
+    args = parse_args()
+
+    if args.mode == "development":
+        uvicorn.run(
+            app="app.__main__:app",
+            # ssl_certfile=join(PATH, "cert", "server.crt"),
+            # ssl_keyfile=join(PATH, "cert", "server.key"),
+            loop="asyncio",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True,
+            env_file="../.env",
+            timeout_graceful_shutdown=settings.SERVER_SHUTDOWN_TIMEOUT,
+            # reload_dirs=["../"],
+            # reload_includes=["../static", "../templates"],
+        )
+    else:
+        # "auto" picks uvloop and httptools when they are installed (uvicorn[standard])
+        uvicorn.run(
+            app="app.__main__:app",
+            loop="auto",
+            http="auto",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=args.workers,
+            backlog=settings.SERVER_BACKLOG,
+            timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+            # open requests finish before the lifespan shutdown closes the pools
+            timeout_graceful_shutdown=settings.SERVER_SHUTDOWN_TIMEOUT,
+        )
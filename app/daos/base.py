@@ -7,6 +7,13 @@ class BaseDao(ABC):
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def _commit(self) -> None:
+        # inside a request's unit of work the commit happens once, at the end of the request
+        if self.session.info.get("unit_of_work"):
+            await self.session.flush()
+        else:
+            await self.session.commit()
+
     @abstractmethod
     async def create(self, request):
         pass
@@ -1,54 +1,208 @@
-from sqlalchemy import delete, select
+import time
+from collections.abc import AsyncIterator
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.daos.base import BaseDao
+from app.db import reads_from_replica
 from app.models.user import User, TempUser
 from app.schemas.user import UserCreate, TempUserCreate, UserEmailVerified
+from app.settings import settings
+from app.utilities.cache import TTLCache
 
 # from app.utilities.logger import logger
 
 
+class UserLookupCache:
+    """
+    In-process TTL cache of user rows, one LRU per lookup key (id, email, username and sub).
+
+    Rows are cached as plain column dicts, so entries never hold on to a session. UserDao
+    invalidates a user's entries once a transaction that wrote that user commits, but only
+    in this process: every other worker keeps serving its copy, including a deleted user or
+    an old `email_verified`, until the entry expires after `ttl` seconds. Flows that act on
+    that state (register, confirm, login) read with `cached=False`.
+
+    Every invalidation bumps `generation`: a row read before an invalidation is not cached
+    afterwards, so a read racing a commit cannot put the old row back.
+    """
+
+    KEYS = ("id", "email", "username", "sub")
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._caches = {key: TTLCache(maxsize=maxsize, ttl=ttl) for key in self.KEYS}
+        self.generation = 0
+        self._written_at: float | None = None
+
+    @staticmethod
+    def _normalize(key: str, value):
+        return value.lower() if key == "email" else value
+
+    def get(self, key: str, value) -> dict | None:
+        return self._caches[key].get(self._normalize(key, value))
+
+    def set(self, row: dict, generation: int) -> None:
+        # `generation` is the value read before the row was loaded
+        if generation != self.generation:
+            return
+        for key in self.KEYS:
+            self._caches[key].set(self._normalize(key, row[key]), row)
+
+    def _written(self) -> None:
+        self.generation += 1
+        self._written_at = time.monotonic()
+
+    def written_within(self, seconds: float) -> bool:
+        return self._written_at is not None and time.monotonic() - self._written_at < seconds
+
+    def invalidate(self, keys: dict) -> None:
+        for key in self.KEYS:
+            self._caches[key].delete(self._normalize(key, keys[key]))
+        self._written()
+
+    def clear(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+        self._written()
+
+    def stats(self) -> dict:
+        return {key: cache.stats() for key, cache in self._caches.items()}
+
+
+user_cache = UserLookupCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+# session.info key of the cache invalidations waiting for the session's commit
+PENDING_INVALIDATIONS = "user_cache_invalidations"
+
+
+def user_row(user: User) -> dict:
+    return {attribute.key: getattr(user, attribute.key) for attribute in inspect(User).column_attrs}
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_invalidations(session: Session) -> None:
+    # invalidating before the commit would let a concurrent read cache the old committed row again
+    for keys in session.info.pop(PENDING_INVALIDATIONS, ()):
+        if keys is None:
+            user_cache.clear()
+        else:
+            user_cache.invalidate(keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_invalidations(session: Session, previous_transaction) -> None:
+    # the writes were rolled back, the cached rows are still current
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
 class UserDao(BaseDao):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session)
 
+    def _invalidate_after_commit(self, user: User | None) -> None:
+        # None clears the whole cache, for bulk writes
+        keys = None if user is None else {key: getattr(user, key) for key in UserLookupCache.KEYS}
+        self.session.info.setdefault(PENDING_INVALIDATIONS, []).append(keys)
+
     async def create(self, user_data: UserCreate) -> User:
         _user = User(**user_data)
         self.session.add(_user)
-        await self.session.commit()
+        await self.session.flush()
+        self._invalidate_after_commit(_user)
+        await self._commit()
         await self.session.refresh(_user)
         return _user
 
+    async def _insert_many(self, users: list[UserCreate], chunk_size: int | None, upsert: bool) -> list[int]:
+        # one multi-row INSERT ... ON CONFLICT (sub) per chunk, all chunks in a single transaction
+        chunk_size = chunk_size or settings.USER_BULK_CHUNK_SIZE
+        # Postgres rejects a statement that hits the same conflict row twice, so the last row per sub wins
+        users = list({user["sub"]: user for user in users}.values())
+
+        ids = []
+        for start in range(0, len(users), chunk_size):
+            chunk = users[start:start + chunk_size]
+            statement = insert(User).values(chunk)
+            if upsert:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[User.sub],
+                    set_={column: statement.excluded[column] for column in chunk[0] if column != "sub"},
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=[User.sub])
+            ids.extend(await self.session.scalars(statement.returning(User.id)))
+
+        self._invalidate_after_commit(None)
+        await self._commit()
+        return ids
+
+    async def create_many(self, users: list[UserCreate], chunk_size: int | None = None) -> list[int]:
+        return await self._insert_many(users, chunk_size, upsert=False)
+
+    async def upsert_many(self, users: list[UserCreate], chunk_size: int | None = None) -> list[int]:
+        return await self._insert_many(users, chunk_size, upsert=True)
+
     async def create_temp_user(self, user_data: TempUserCreate) -> TempUser:
         _user = TempUser(**user_data)
         self.session.add(_user)
-        await self.session.commit()
+        await self._commit()
         await self.session.refresh(_user)
         return _user
 
-    async def update_email_verified(self, username: UserEmailVerified):
-        _user = await self.get_by_username(username)
-        _user.email_verified = True
-        self.session.add(_user)
-        await self.session.commit()
-        await self.session.refresh(_user)
+    async def _update_by_username(self, username: str, **values) -> User | None:
+        # single UPDATE ... RETURNING round trip instead of SELECT, UPDATE and refresh
+        statement = update(User).where(User.username == username).values(**values).returning(User)
+        _user = await self.session.scalar(statement=statement)
+        if _user is not None:
+            self._invalidate_after_commit(_user)
+        await self._commit()
         return _user
 
+    async def update_email_verified(self, username: UserEmailVerified):
+        return await self._update_by_username(username, email_verified=True)
+
     async def update_salt(self, username: str, salt: str):
-        _user = await self.get_by_username(username)
-        _user.salt = salt
-        self.session.add(_user)
-        await self.session.commit()
-        await self.session.refresh(_user)
+        return await self._update_by_username(username, salt=salt)
+
+    async def confirm_user(self, username: str, salt: str) -> User | None:
+        return await self._update_by_username(username, email_verified=True, salt=salt)
+
+    async def _get_cached(self, key: str, value, statement, cached: bool = True) -> User | None:
+        # a session that wrote users reads its own uncommitted rows: it neither uses nor fills the cache
+        wrote = bool(self.session.info.get(PENDING_INVALIDATIONS))
+        # an uncached read still refreshes this worker's entry
+        if cached and not wrote:
+            row = user_cache.get(key, value)
+            if row is not None:
+                _user = User(**row)
+                make_transient_to_detached(_user)
+                return await self.session.merge(_user, load=False)
+
+        generation = user_cache.generation
+        # a replica read shortly after a write on this worker may still return the old row
+        lagging = reads_from_replica(self.session) and user_cache.written_within(settings.USER_CACHE_REPLICA_LAG)
+
+        _user = await self.session.scalar(statement=statement)
+        if _user is not None and not wrote and not lagging:
+            user_cache.set(user_row(_user), generation)
         return _user
 
     async def get_by_id(self, user_id: int) -> User | None:
         statement = select(User).where(User.id == user_id)
-        return await self.session.scalar(statement=statement)
+        return await self._get_cached("id", user_id, statement)
 
-    async def get_by_email(self, email) -> User | None:
-        statement = select(User).where(User.email == email)
-        return await self.session.scalar(statement=statement)
+    async def get_by_email(self, email, cached: bool = True) -> User | None:
+        # lower(email) is served by the ix_user_lower_email index
+        statement = select(User).where(func.lower(User.email) == email.lower())
+        return await self._get_cached("email", email, statement, cached=cached)
+
+    async def get_by_sub(self, sub: str) -> User | None:
+        statement = select(User).where(User.sub == sub)
+        return await self._get_cached("sub", sub, statement)
 
     async def get_temp_by_email(self, email) -> TempUser | None:
         statement = select(TempUser).where(TempUser.email == email)
@@ -56,7 +210,7 @@ class UserDao(BaseDao):
 
     async def get_by_username(self, username: str) -> User | None:
         statement = select(User).where(User.username == username)
-        return await self.session.scalar(statement=statement)
+        return await self._get_cached("username", username, statement)
 
     async def get_temp_by_username(self, username: str) -> TempUser | None:
         statement = select(TempUser).where(TempUser.username == username)
@@ -67,20 +221,36 @@ class UserDao(BaseDao):
         result = await self.session.execute(statement=statement)
         return result.scalars().all()
 
+    async def get_page(self, limit: int, after_id: int | None = None) -> list[User]:
+        # keyset pagination: seek past the last id seen instead of OFFSET, so every page costs the same
+        statement = select(User).order_by(User.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(User.id > after_id)
+        result = await self.session.execute(statement=statement)
+        return result.scalars().all()
+
+    async def stream_all(self, columns: list, chunk_size: int) -> AsyncIterator[list[dict]]:
+        # server-side cursor: rows arrive chunk_size at a time, plain column rows keep the identity map empty
+        statement = select(*[getattr(User, column) for column in columns]).order_by(User.id)
+        result = await self.session.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions(chunk_size):
+            yield partition
+
     async def delete_all(self) -> None:
         await self.session.execute(delete(User))
-        await self.session.commit()
+        self._invalidate_after_commit(None)
+        await self._commit()
 
     async def delete_temp_by_id(self, user_id: int) -> TempUser | None:
-        _user = await self.get_by_id(user_id=user_id)
-        statement = delete(TempUser).where(TempUser.id == user_id)
-        await self.session.execute(statement=statement)
-        await self.session.commit()
+        statement = delete(TempUser).where(TempUser.id == user_id).returning(TempUser)
+        _user = await self.session.scalar(statement=statement)
+        await self._commit()
         return _user
 
     async def delete_by_id(self, user_id: int) -> User | None:
-        _user = await self.get_by_id(user_id=user_id)
-        statement = delete(User).where(User.id == user_id)
-        await self.session.execute(statement=statement)
-        await self.session.commit()
+        statement = delete(User).where(User.id == user_id).returning(User)
+        _user = await self.session.scalar(statement=statement)
+        if _user is not None:
+            self._invalidate_after_commit(_user)
+        await self._commit()
         return _user
@@ -1,9 +1,19 @@
+import asyncio
+import os
+import threading
+import time
 from collections.abc import AsyncGenerator
+from contextlib import AsyncExitStack
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy import Select, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.sql.dml import UpdateBase
 
 from app.settings import settings
 from urllib.parse import quote
@@ -18,8 +28,190 @@ postgres_url = (
     f"{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 )
 
+# Direct connection to the Postgres server for migrations, which hold a session-level advisory
+# lock and must not go through a transaction-pooling PgBouncer
+direct_url = (
+    f"postgresql+asyncpg://{settings.POSTGRES_USER}:{quoted_password}@"
+    f"{settings.POSTGRES_DIRECT_HOST}:{settings.POSTGRES_DIRECT_PORT}/{settings.POSTGRES_DB}"
+) if settings.POSTGRES_DIRECT_HOST else postgres_url
+
+# The read replica shares the primary's credentials; it is only used when a host is configured
+replica_url = (
+    f"postgresql+asyncpg://{settings.POSTGRES_USER}:{quoted_password}@"
+    f"{settings.POSTGRES_REPLICA_HOST}:{settings.POSTGRES_REPLICA_PORT}/"
+    f"{settings.POSTGRES_REPLICA_DB or settings.POSTGRES_DB}"
+) if settings.POSTGRES_REPLICA_HOST else None
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that records how long callers wait to acquire a connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.acquired += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return connection
+
+
+def prepared_statement_name() -> str:
+    # unique names, so statements prepared on different client connections never collide on a
+    # server connection that PgBouncer hands from one client to another
+    return f"__asyncpg_{settings.DB_PREPARED_STATEMENT_NAME_PREFIX}{uuid4().hex}__"
+
+
+def engine_options(pgbouncer_mode: bool, prepared_statement_cache_size: int) -> dict:
+    """
+    Build the create_async_engine keyword arguments for the configured connection mode.
+
+    In PgBouncer mode (transaction pooling) both asyncpg's and SQLAlchemy's statement caches
+    are turned off, prepared statements get unique names and the app-side pool is replaced
+    by NullPool, since PgBouncer does the pooling and server connections change between
+    transactions: a statement prepared in one transaction may not exist in the next.
+
+    Args:
+        pgbouncer_mode (bool): Whether connections go through a transaction-pooling PgBouncer.
+        prepared_statement_cache_size (int): Size of SQLAlchemy's per-connection prepared statement cache,
+            ignored in PgBouncer mode.
+
+    Returns:
+        dict: Keyword arguments for create_async_engine.
+    """
+    connect_args = {"prepared_statement_cache_size": prepared_statement_cache_size}
+
+    if pgbouncer_mode:
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = prepared_statement_name
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
 # Create the async engine
-engine = create_async_engine(postgres_url)
+engine = create_async_engine(
+    postgres_url,
+    **engine_options(settings.DB_PGBOUNCER_MODE, settings.DB_PREPARED_STATEMENT_CACHE_SIZE),
+)
+
+replica_engine = None
+if replica_url:
+    replica_options = engine_options(settings.DB_PGBOUNCER_MODE, settings.DB_PREPARED_STATEMENT_CACHE_SIZE)
+    replica_options["connect_args"]["timeout"] = settings.DB_REPLICA_CONNECT_TIMEOUT
+    replica_engine = create_async_engine(replica_url, **replica_options)
+
+
+class ReplicaHealth:
+    """Takes the read replica out of rotation for `retry_interval` seconds after a connection failure."""
+
+    def __init__(self, retry_interval: float) -> None:
+        self.retry_interval = retry_interval
+        self.fallbacks = 0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return replica_engine is not None and time.monotonic() >= self._down_until
+
+    def mark_down(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+            self._down_until = time.monotonic() + self.retry_interval
+
+    def stats(self) -> dict:
+        return {"available": self.available(), "fallbacks": self.fallbacks}
+
+
+replica_health = ReplicaHealth(settings.DB_REPLICA_RETRY_INTERVAL)
+
+
+def is_connection_error(error: Exception) -> bool:
+    if isinstance(error, exc.DBAPIError):
+        return error.connection_invalidated or isinstance(error, (exc.OperationalError, exc.InterfaceError))
+    # asyncpg raises the connect timeout unwrapped; before Python 3.11 asyncio.TimeoutError is not an OSError
+    return isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError))
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the read replica and everything else to the primary.
+
+    Once a session writes (INSERT/UPDATE/DELETE or a flush) it stays on the primary so later
+    reads see its own writes; `use_primary` pins a session up front for read-then-write flows.
+    A statement whose replica connection fails is retried on the primary, and the replica is
+    skipped for DB_REPLICA_RETRY_INTERVAL seconds.
+    """
+
+    _routed_to_replica = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if isinstance(clause, UpdateBase) or self._flushing:
+            self.info["use_primary"] = True
+
+        if (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self.info.get("use_primary")
+            and replica_health.available()
+        ):
+            self._routed_to_replica = True
+            return replica_engine.sync_engine
+
+        return engine.sync_engine
+
+    def _with_replica_fallback(self, method, *args, **kwargs):
+        self._routed_to_replica = False
+        try:
+            return method(*args, **kwargs)
+        except Exception as error:
+            if not self._routed_to_replica or not is_connection_error(error):
+                raise
+
+        replica_health.mark_down()
+        # only sessions that have not written read from the replica, so nothing is lost here
+        if not self.is_active:
+            self.rollback()
+        return method(*args, **kwargs)
+
+    def _execute_internal(self, *args, **kwargs):
+        # the common path of execute, scalar, scalars, get and lazy loads
+        return self._with_replica_fallback(super()._execute_internal, *args, **kwargs)
+
+
+def use_primary(session: AsyncSession) -> None:
+    """Route every statement of this session to the primary (read-your-writes flows)."""
+    session.info["use_primary"] = True
+
+
+def reads_from_replica(session: AsyncSession) -> bool:
+    """Whether plain SELECTs of this session currently go to the read replica."""
+    return not session.info.get("use_primary") and replica_health.available()
+
 
 # Create the session factory
 AsyncSessionFactory = async_sessionmaker(
@@ -28,10 +220,96 @@ AsyncSessionFactory = async_sessionmaker(
     expire_on_commit=False,
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
 )
 
 
 # Function to get a new session
 async def get_session() -> AsyncGenerator:
     async with AsyncSessionFactory() as session:
-        yield session
+        if not settings.DB_UNIT_OF_WORK:
+            yield session
+            return
+
+        # unit of work: DAO writes only flush, the request commits once or rolls back on error
+        session.info["unit_of_work"] = True
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+        await complete_unit_of_work(session)
+
+
+async def complete_unit_of_work(session: AsyncSession) -> None:
+    # a failed flush the endpoint handled itself (answering with an error response) is rolled back
+    if not session.is_active:
+        await session.rollback()
+    elif session.in_transaction():
+        await session.commit()
+
+
+async def warm_up_pools(count: int) -> None:
+    """
+    Open up to `count` connections in each pool so the first requests do not pay for the handshake.
+
+    The connections are held together while they are opened, so each one is a new connection,
+    and are then returned to the pool idle. Nothing is opened in PgBouncer mode.
+
+    Args:
+        count (int): Connections to open per pool, capped at the pool size.
+    """
+    for pool_engine in (engine, replica_engine):
+        if pool_engine is None or not isinstance(pool_engine.pool, AsyncAdaptedQueuePool):
+            continue
+
+        async with AsyncExitStack() as stack:
+            # wait for every attempt, so no connection is checked out after the stack has closed
+            results = await asyncio.gather(*(
+                stack.enter_async_context(pool_engine.connect())
+                for _ in range(min(count, pool_engine.pool.size()))
+            ), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of the primary and replica engines."""
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+def pool_metrics() -> dict:
+    """
+    Report the connection pool usage of this worker process.
+
+    Returns:
+        dict: Checked-out, idle and overflow connections plus the time spent acquiring connections,
+        with the same figures and the fallback count for the read replica when one is configured.
+    """
+    metrics = {"pid": os.getpid(), **_pool_stats(engine.pool)}
+    if replica_engine is not None:
+        metrics["replica"] = {**_pool_stats(replica_engine.pool), **replica_health.stats()}
+    return metrics
+
+
+def _pool_stats(pool) -> dict:
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        # PgBouncer mode: connections are pooled by PgBouncer, not in this process
+        return {"pool": type(pool).__name__}
+
+    acquired = getattr(pool, "acquired", 0)
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "acquired": acquired,
+        "acquire_timeouts": getattr(pool, "timeouts", 0),
+        "acquire_wait_avg_ms": getattr(pool, "wait_total", 0.0) / acquired * 1000 if acquired else 0.0,
+        "acquire_wait_max_ms": getattr(pool, "wait_max", 0.0) * 1000,
+    }
@@ -1,38 +1,63 @@
-from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import traceback
 from app.utilities.logger import logger
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.settings import settings
 
 # Determine environment
-environment = os.getenv("ENVIRONMENT", "development")
+environment = settings.ENVIRONMENT
 development = environment == "development"
 
 
-async def application_level_error(request: Request, call_next):
-    try:
-        # Proceed with the request
-        response = await call_next(request)
-        return response
-    except Exception as exp:
-        # Log the full traceback for debugging in development
-        if development:
-            error_details = traceback.format_exc()
-            logger.error(f"An error occurred while processing the request: {str(exp)}.")
-            logger.error("------------------------------------traceback------------------------------------")
-            logger.error(error_details)
-            logger.error("---------------------------------------------------------------------------------")
-
-        # Return a JSON error response to the client
-        return JSONResponse(
-            {
-                "success": False,
-                "message": "An unexpected error occurred while processing your request. "
-                           "Our team has been notified and is working to resolve the issue. "
-                           "Please try again later."
-            },
-            status_code=500
-        )
+class ApplicationErrorMiddleware:
+    """
+    Answer unhandled exceptions with a JSON 500 response.
+
+    A pure ASGI middleware: messages are passed straight through, without the extra task,
+    memory stream and response buffering that `app.middleware('http')` adds to every request.
+    An exception raised after the response has started can no longer be turned into the error
+    response, so it is re-raised and the server closes the connection.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            # Proceed with the request
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exp:
+            if response_started:
+                raise
+
+            # Log the full traceback for debugging in development
+            if development:
+                error_details = traceback.format_exc()
+                logger.error(f"An error occurred while processing the request: {str(exp)}.")
+                logger.error("------------------------------------traceback------------------------------------")
+                logger.error(error_details)
+                logger.error("---------------------------------------------------------------------------------")
+
+            # Return a JSON error response to the client
+            response = JSONResponse(
+                {
+                    "success": False,
+                    "message": "An unexpected error occurred while processing your request. "
+                               "Our team has been notified and is working to resolve the issue. "
+                               "Please try again later."
+                },
+                status_code=500
+            )
+            await response(scope, receive, send)
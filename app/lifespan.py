@@ -0,0 +1,52 @@
+from fastapi import FastAPI
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.db import dispose_engines, warm_up_pools
+from app.run_migration import run_migration
+from app.settings import settings
+from app.utilities.auth import build_http_client, jwks_store
+from app.utilities.cognito import cognito_obj
+from app.utilities.logger import logger
+from aws_wrapper import Cognito_wrapper as cognito_module
+
+
+async def warm_up() -> None:
+    """
+    Do the slow first-time work before the server reports the worker ready.
+
+    Opens DB_WARMUP_CONNECTIONS pool connections, downloads the JWKS and builds the Cognito
+    client concurrently. A failure is logged and left to the first request that needs it.
+    """
+    tasks = {
+        "database pool": warm_up_pools(settings.DB_WARMUP_CONNECTIONS),
+        "JWKS": jwks_store.refresh(),
+        # building the botocore client reads its service model from disk, keep it off the loop
+        "Cognito client": asyncio.to_thread(cognito_module.get_cognito_client),
+    }
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for name, result in zip(tasks, results):
+        if isinstance(result, Exception):
+            logger.warning("Startup warmup of the %s failed: %s", name, result)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # alembic/env.py leaves migrations to developers in development, so startup does too
+    if settings.ENVIRONMENT != "development":
+        await run_migration()
+
+    # the Cognito thread pool is closed at shutdown, a lifespan entered again needs a new one
+    cognito_obj.start()
+
+    # shared keep-alive client for JWKS downloads, closed when the app shuts down
+    async with build_http_client() as client:
+        jwks_store.client = client
+        await warm_up()
+        # the server drains open requests (SERVER_SHUTDOWN_TIMEOUT) before the code after yield runs
+        yield
+        jwks_store.client = None
+
+    cognito_obj.shutdown()
+    await dispose_engines()
@@ -2,11 +2,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.lifespan import lifespan
 from app.routers.api_router import api_router
 from app.settings import settings
 
-app = FastAPI(title="So Fast Project", version="0.1.0")
-origins = ["http://localhost:5173", settings.FRONTEND_URL]
+app = FastAPI(title="So Fast Project", version="0.1.0", lifespan=lifespan)
+origins = ["http://localhost:5173"]
+if settings.FRONTEND_URL:
+    origins.append(settings.FRONTEND_URL)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,4 +1,4 @@
-from sqlalchemy import String
+from sqlalchemy import Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, intpk
@@ -8,7 +8,7 @@ class User(Base):
     __tablename__ = "user"
 
     id: Mapped[intpk]
-    username: Mapped[str]
+    username: Mapped[str] = mapped_column(index=True)
     sub: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
     name: Mapped[str]
     email: Mapped[str]
@@ -20,6 +20,10 @@ class User(Base):
     projects = relationship("Project", back_populates="user")
 
 
+# unique and case-insensitive, matched by UserDao.get_by_email
+Index("ix_user_lower_email", func.lower(User.email), unique=True)
+
+
 class TempUser(Base):
     __tablename__ = "temp_user_data"
 
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.routers import auth, user, test
+from app.routers import auth, user, test, metrics
 
 api_router = APIRouter(prefix="/api/v1")
 
 api_router.include_router(user.router)
 api_router.include_router(auth.router)
 api_router.include_router(test.router)
+api_router.include_router(metrics.router)
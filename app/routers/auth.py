@@ -4,18 +4,12 @@ from fastapi import Depends
 from app.db import get_session
 # from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-import os
-from dotenv import load_dotenv
 from app.services.auth import AuthService
 from app.utilities.auth import is_authenticated
+from app.utilities.unit_of_work import UnitOfWorkRoute
 
 
-load_dotenv()
-
-CLIENT_ID = os.getenv('CLIENT_ID')
-CLIENT_SECRET = os.getenv('CLIENT_SECRET')
-
-router = APIRouter(tags=['User'], prefix='/auth')
+router = APIRouter(tags=['User'], prefix='/auth', route_class=UnitOfWorkRoute)
 
 
 @router.post('/login', status_code=status.HTTP_200_OK)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+
+from app.daos.user import user_cache
+from app.db import pool_metrics
+from app.utilities.auth import is_admin, token_cache, user_info_cache
+from app.utilities.cognito import cognito_obj
+
+# pool internals, breaker state and cache sizes are for operators only
+router = APIRouter(tags=['Metrics'], prefix='/metrics', dependencies=[Depends(is_admin)])
+
+
+@router.get('/auth', status_code=status.HTTP_200_OK)
+async def auth_metrics():
+    return JSONResponse({
+        "success": True,
+        "data": {
+            "token_cache": token_cache.stats(),
+            "user_info_cache": user_info_cache.stats(),
+        }
+    })
+
+
+@router.get('/cognito', status_code=status.HTTP_200_OK)
+async def cognito_metrics():
+    return JSONResponse({"success": True, "data": cognito_obj.stats()})
+
+
+@router.get('/db', status_code=status.HTTP_200_OK)
+async def db_metrics():
+    return JSONResponse({"success": True, "data": {**pool_metrics(), "user_cache": user_cache.stats()}})
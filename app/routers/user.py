@@ -1,14 +1,18 @@
-from fastapi import APIRouter, status, Request, Depends
+from typing import Literal
+
+from fastapi import APIRouter, status, Request, Depends, Query
 from app.db import get_session
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.services.user import UserService
-from app.utilities.auth import is_authenticated
+from app.utilities.auth import is_admin, is_authenticated
+from app.utilities.unit_of_work import UnitOfWorkRoute
 from app.services.utils import UtilsService
+from app.settings import settings
 
-router = APIRouter(tags=['User'], prefix='/user')
+router = APIRouter(tags=['User'], prefix='/user', route_class=UnitOfWorkRoute)
 
 
 @router.post('/profile', status_code=status.HTTP_202_ACCEPTED)
@@ -20,3 +24,21 @@ async def user_profile(request: Request, _=Depends(is_authenticated), session: A
 async def get_user_profile(request: Request, authenticated=Depends(is_authenticated)):
     UtilsService.token_handler(request)
     return JSONResponse({'MESSAGE': f"Hello {authenticated['username']}", "authenticated": authenticated})
+
+
+@router.get('/list', status_code=status.HTTP_200_OK)
+async def list_users(
+    limit: int = Query(settings.USER_PAGE_SIZE_DEFAULT, ge=1, le=settings.USER_PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    _=Depends(is_admin),
+    session: AsyncSession = Depends(get_session),
+):
+    return await UserService.list_users(limit, cursor, session)
+
+
+@router.get('/export', status_code=status.HTTP_200_OK)
+async def export_users(
+    export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    _=Depends(is_admin),
+):
+    return await UserService.export_users(export_format)
@@ -1,5 +1,111 @@
-import subprocess
+import asyncio
+import os
+import time
 
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 
-def run_migration():
-    subprocess.run(["alembic", "upgrade", "head"], check=True)
+from alembic import command
+from app.db import direct_url
+from app.settings import settings
+from app.utilities.logger import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# key of the Postgres advisory lock held while migrating, shared by every process of this app
+MIGRATION_LOCK_KEY = 727_301_117
+MIGRATION_LOCK_POLL_INTERVAL = 0.5
+# seconds between two "still waiting" log lines
+MIGRATION_LOCK_LOG_INTERVAL = 10
+
+
+class MigrationLockTimeout(Exception):
+    """Raised when another process held the migration lock for longer than DB_MIGRATION_LOCK_TIMEOUT."""
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    return config
+
+
+def current_revisions(connection) -> set[str]:
+    try:
+        return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    except exc.ProgrammingError:
+        # no alembic_version table yet: nothing has been migrated
+        connection.rollback()
+        return set()
+
+
+def upgrade(connection, config: Config) -> None:
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+
+async def acquire_migration_lock(connection, timeout: float) -> None:
+    # poll instead of blocking in pg_advisory_lock: CREATE INDEX CONCURRENTLY waits for every
+    # open transaction, including a statement still waiting for the lock, and would deadlock
+    lock = text("SELECT pg_try_advisory_lock(:key)")
+    started = time.monotonic()
+    logged = started
+    while not (await connection.execute(lock, {"key": MIGRATION_LOCK_KEY})).scalar():
+        waited = time.monotonic() - started
+        if waited >= timeout:
+            raise MigrationLockTimeout(
+                f"Gave up after {waited:.0f}s waiting for the migration lock (pg advisory lock {MIGRATION_LOCK_KEY})"
+            )
+        if time.monotonic() - logged >= MIGRATION_LOCK_LOG_INTERVAL:
+            logged = time.monotonic()
+            logger.info("Waiting %.0fs for another process to finish migrating the database", waited)
+        await asyncio.sleep(MIGRATION_LOCK_POLL_INTERVAL)
+
+
+async def run_migration() -> None:
+    """
+    Upgrade the database to head in-process, with only one process migrating at a time.
+
+    When `alembic_version` is already at head this costs a single query. Otherwise the
+    process waits up to DB_MIGRATION_LOCK_TIMEOUT seconds for a Postgres advisory lock,
+    checks again (another worker or replica may have migrated while it waited) and runs
+    `alembic upgrade head` on the locked connection.
+
+    The session-level lock needs one server connection from lock to unlock, so migrations use
+    a direct, unpooled connection (POSTGRES_DIRECT_HOST) rather than the app engine, which
+    may go through a transaction-pooling PgBouncer.
+
+    Raises:
+        MigrationLockTimeout: If the lock could not be acquired in time.
+    """
+    config = alembic_config()
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    migration_engine = create_async_engine(direct_url, poolclass=NullPool)
+
+    try:
+        async with migration_engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if await connection.run_sync(current_revisions) == heads:
+                return
+
+            await acquire_migration_lock(connection, settings.DB_MIGRATION_LOCK_TIMEOUT)
+            try:
+                if await connection.run_sync(current_revisions) == heads:
+                    logger.info("Database was migrated by another process")
+                    return
+
+                # hand alembic a connection outside any transaction so it can manage its own,
+                # including the autocommit blocks used for concurrent index builds
+                await connection.commit()
+                await connection.execution_options(
+                    isolation_level=connection.sync_connection.default_isolation_level
+                )
+                logger.info("Migrating database to %s", ", ".join(sorted(heads)))
+                await connection.run_sync(upgrade, config)
+            finally:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                await connection.commit()
+    finally:
+        await migration_engine.dispose()
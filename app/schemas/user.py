@@ -38,6 +38,21 @@ class UserOut(UserBase):
     id: int
 
 
+class UserListItem(BaseModel):
+    id: int
+    username: str
+    sub: str
+    name: str
+    email: str
+    email_verified: bool
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserPage(BaseModel):
+    items: list[UserListItem]
+    next_cursor: str | None
+
+
 class ChangePasswordIn(BaseModel):
     old_password: str
     new_password: str
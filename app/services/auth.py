@@ -1,28 +1,22 @@
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from app.services.utils import UtilsService
-from aws_wrapper.Cognito_wrapper import Cognito_wrapper
+from app.utilities.cognito import cognito_obj
 from app.utilities.username_validate import validate_username
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.daos.user import UserDao
+from app.db import use_primary
 
 from app.utilities.logger import logger
 from app.services.data_parser import DataParserService
 from app.utilities.auth import validate_password
-
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.settings import settings
 
 data_parser_obj = DataParserService()
 
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-
-
-cognito_obj = Cognito_wrapper()
+CLIENT_ID = settings.CLIENT_ID
+CLIENT_SECRET = settings.CLIENT_SECRET
 
 
 class AuthService:
@@ -47,10 +41,12 @@ class AuthService:
 
         email = body.get("email", "")
         password = body.get("password", "")
+        # login usually follows confirm_signup within seconds, before a replica may have caught up
+        use_primary(session)
         user_session_dao = UserDao(session)
 
         secret_hash = UtilsService.calculate_secret_hash(email, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        user_value = cognito_obj.initiate_auth(
+        user_value = await cognito_obj.initiate_auth(
             username=email, password=password, client_id=CLIENT_ID, secret_hash=secret_hash
         )
         if await AuthService._check_success(user_value):
@@ -59,7 +55,8 @@ class AuthService:
             return_value = {"success": False, "message": user_value.get("message", "")}
 
         if return_value['success']:
-            user_info = await user_session_dao.get_by_email(email)
+            # other workers' caches may still hold a deleted or unconfirmed user
+            user_info = await user_session_dao.get_by_email(email, cached=False)
             required_keys = ['username', 'email', 'email_verified']
 
             if isinstance(user_info, type(None)):
@@ -77,6 +74,8 @@ class AuthService:
 
     @staticmethod
     async def register(request: Request, session: AsyncSession) -> JSONResponse:
+        # the duplicate check guards the insert, so it must not read a lagging replica
+        use_primary(session)
         user_session_dao = UserDao(session)
 
         body = await request.json()
@@ -130,7 +129,7 @@ class AuthService:
         #         status_code=404
         #     )
 
-        user_exists = await user_session_dao.get_by_email(email)
+        user_exists = await user_session_dao.get_by_email(email, cached=False)
         # TODO we need to handle if user already exists but if email is not verified then what to do?
         if user_exists is not None:
             return JSONResponse(
@@ -142,7 +141,7 @@ class AuthService:
             )
 
         secret_hash = UtilsService.calculate_secret_hash(username, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        response = cognito_obj.sign_up(
+        response = await cognito_obj.sign_up(
             username=username, password=password, client_id=CLIENT_ID, secret_hash=secret_hash, name=name, email=email
         )
 
@@ -161,12 +160,13 @@ class AuthService:
 
     @staticmethod
     async def confirm_signup(request: Request, session: AsyncSession) -> JSONResponse:
+        use_primary(session)
         user_session_dao = UserDao(session)
         body = await request.json()
         email = body.get("email", "")
         confirmation_code = body.get("code", "")
 
-        user_info = await user_session_dao.get_by_email(email=email)
+        user_info = await user_session_dao.get_by_email(email=email, cached=False)
         try:
             username = user_info.username
         except Exception as exp:
@@ -180,7 +180,7 @@ class AuthService:
             )
 
         secret_hash = UtilsService.calculate_secret_hash(username, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        response = cognito_obj.confirm_sign_up(
+        response = await cognito_obj.confirm_sign_up(
             client_id=CLIENT_ID, secret_hash=secret_hash, username=username, confirmation_code=confirmation_code
         )
 
@@ -189,8 +189,7 @@ class AuthService:
         if not await AuthService._check_success(response):
             return await AuthService.create_response(response)
 
-        await user_session_dao.update_email_verified(username)
-        await user_session_dao.update_salt(username=username, salt=salt)
+        await user_session_dao.confirm_user(username=username, salt=salt)
         # await user_session_dao.delete_temp_by_id(user_data.id)
         return await AuthService.create_response(response, message="Your account has been confirmed successfully. You can now log in.")
 
@@ -202,7 +201,7 @@ class AuthService:
         auth_method = "REFRESH_TOKEN_AUTH"
 
         secret_hash = UtilsService.calculate_secret_hash(username, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        response = cognito_obj.initiate_auth(
+        response = await cognito_obj.initiate_auth(
             client_id=CLIENT_ID, secret_hash=secret_hash, refresh_token=refresh_token, auth_flow=auth_method
         )
         return await AuthService.create_response(response, message="Token generated successfully.")
@@ -222,7 +221,7 @@ class AuthService:
             )
 
         secret_hash = UtilsService.calculate_secret_hash(email, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        response = cognito_obj.resend_confirmation_code(client_id=CLIENT_ID, secret_hash=secret_hash, username=email)
+        response = await cognito_obj.resend_confirmation_code(client_id=CLIENT_ID, secret_hash=secret_hash, username=email)
         return await AuthService.create_response(response, message="Token generated successfully. Check your mail for the OTP code.")
 
     @staticmethod
@@ -252,7 +251,7 @@ class AuthService:
                 status_code=404
             )
 
-        response = cognito_obj.reset_password(o_password=old_password, n_password=new_password, access_token=access_token)
+        response = await cognito_obj.reset_password(o_password=old_password, n_password=new_password, access_token=access_token)
         return await AuthService.create_response(response, message="Password changed successfully. Now you can login using new password.")
 
     @staticmethod
@@ -261,7 +260,7 @@ class AuthService:
         username = body.get("username", "")
 
         secret_hash = UtilsService.calculate_secret_hash(username, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-        response = cognito_obj.forgot_password_initial(client_id=CLIENT_ID, secret_hash=secret_hash, username=username)
+        response = await cognito_obj.forgot_password_initial(client_id=CLIENT_ID, secret_hash=secret_hash, username=username)
 
         return await AuthService.create_response(response, message="Password reset request received. Please check your email for OTP Code.")
 
@@ -288,6 +287,6 @@ class AuthService:
         secret_hash = UtilsService.calculate_secret_hash(username, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
         # TODO
         # need to implement logic to handle passowrd change on the coder.
-        response = cognito_obj.confirm_forgot_password(client_id=CLIENT_ID, secret_hash=secret_hash, username=username, code=code, password=password)
+        response = await cognito_obj.confirm_forgot_password(client_id=CLIENT_ID, secret_hash=secret_hash, username=username, code=code, password=password)
 
         return await AuthService.create_response(response, message="Password has been reset successfully. You can now log in with your new password.")
@@ -1,17 +1,25 @@
 from fastapi import Request
-from aws_wrapper.Cognito_wrapper import Cognito_wrapper
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import csv
+import io
+import json
+
 
 from app.services.data_parser import DataParserService
 from app.daos.user import UserDao
+from app.db import AsyncSessionFactory
+from app.schemas.user import UserListItem, UserPage
 from app.services.utils import UtilsService
 from app.utilities.logger import logger
+from app.utilities.cognito import cognito_obj
+from app.settings import settings
 
-cognito_obj = Cognito_wrapper()
 data_parser_obj = DataParserService()
 
+EXPORT_COLUMNS = ["id", "username", "sub", "name", "email", "email_verified"]
+
 
 class UserService:
     @staticmethod
@@ -37,7 +45,7 @@ class UserService:
         # access_token = request.cookies.get("accessToken", '')
         try:
             access_token = UtilsService.token_handler(request)
-            response = cognito_obj.get_user(access_token=access_token)
+            response = await cognito_obj.get_user(access_token=access_token)
 
             value = data_parser_obj.parse_user_info(response)
 
@@ -55,3 +63,56 @@ class UserService:
                 },
                 status_code=404
             )
+
+    @staticmethod
+    async def list_users(limit: int, cursor: str | None, session: AsyncSession) -> JSONResponse:
+        after_id = None
+        if cursor:
+            after_id = UtilsService.decode_cursor(cursor)
+            if after_id is None:
+                return JSONResponse(
+                    {
+                        "success": False,
+                        "message": "Invalid cursor."
+                    },
+                    status_code=400
+                )
+
+        # one extra row tells whether another page exists
+        users = await UserDao(session).get_page(limit + 1, after_id=after_id)
+        has_more = len(users) > limit
+        users = users[:limit]
+
+        page = UserPage(
+            items=[UserListItem.model_validate(user) for user in users],
+            next_cursor=UtilsService.encode_cursor(users[-1].id) if has_more else None,
+        )
+        return JSONResponse({"success": True, "data": page.model_dump()})
+
+    @staticmethod
+    def _format_export_chunk(rows: list[dict], export_format: str) -> str:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS).writerows(rows)
+            return buffer.getvalue()
+
+        return "".join(json.dumps(dict(row)) + "\n" for row in rows)
+
+    @staticmethod
+    async def export_users(export_format: str) -> StreamingResponse:
+        async def chunks():
+            # the response outlives the request-scoped session, so the stream opens its own
+            async with AsyncSessionFactory() as session:
+                if export_format == "csv":
+                    yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+                user_session_dao = UserDao(session)
+                async for rows in user_session_dao.stream_all(EXPORT_COLUMNS, settings.USER_EXPORT_CHUNK_SIZE):
+                    yield UserService._format_export_chunk(rows, export_format)
+
+        media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            chunks(),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+        )
@@ -3,6 +3,7 @@ from fastapi import Request
 import base64
 import hashlib
 import hmac
+import json
 import random
 import re
 import string
@@ -10,12 +11,14 @@ import time
 import uuid
 from urllib.parse import urlparse
 
-import boto3
 import jwt
 from botocore.exceptions import ClientError
 
-from app.settings import settings
 from app.utilities.logger import logger
+from aws_wrapper.session import build_aws_session
+
+# largest value of the int4 primary keys paginated with cursors
+MAX_CURSOR_ID = 2**31 - 1
 
 
 class UtilsService:
@@ -36,6 +39,24 @@ class UtilsService:
 
         return access_token
 
+    @staticmethod
+    def encode_cursor(last_id: int) -> str:
+        payload = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int | None:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            last_id = json.loads(payload)["id"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        # a cursor is client input: reject booleans (an int subclass) and ids outside the int4 id column
+        if type(last_id) is not int or not 0 < last_id <= MAX_CURSOR_ID:
+            return None
+        return last_id
+
     @staticmethod
     async def generate_salt(lenght: int = 32):
         salt = uuid.uuid4().hex
@@ -101,8 +122,8 @@ class UtilsService:
     @staticmethod
     def send_email(sender_mail: str, recipient_mail: str, subject: str, body: str):
         try:
-            # Create a new SES resource and specify a region.
-            client = boto3.client("ses", region_name=settings.REGION)
+            # Create a new SES client with the app's AWS credentials and region.
+            client = build_aws_session().client("ses")
             response = client.send_email(
                 Destination={
                     "ToAddresses": [
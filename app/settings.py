@@ -18,6 +18,103 @@ class Settings(BaseSettings):
     SENDER_MAIL: str
     SERVICE_NAME: str
     ENVIRONMENT: str
+    # empty keys use boto3's default credential chain (instance/task role, ~/.aws)
+    AWS_ACCESS_KEY_ID: str = ""
+    AWS_SECRET_ACCESS_KEY: str = ""
+
+    # origin of the deployed frontend allowed by CORS next to the local dev server; empty allows only that
+    FRONTEND_URL: str = ""
+
+    # uvicorn server used by `python -m app`; SERVER_WORKERS=0 starts one worker per CPU in production
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5
+    # seconds open requests get to finish on shutdown before they are cancelled
+    SERVER_SHUTDOWN_TIMEOUT: int = 30
+
+    # database connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # connections opened at startup, capped at DB_POOL_SIZE; 0 opens them on first use
+    DB_WARMUP_CONNECTIONS: int = 5
+    # set when connecting through PgBouncer in transaction pooling mode
+    DB_PGBOUNCER_MODE: bool = False
+    # SQLAlchemy's per-connection prepared statement cache, 0 disables it; always off in PgBouncer mode
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_NAME_PREFIX: str = ""
+    # direct Postgres address for migrations, bypassing PgBouncer; empty uses POSTGRES_HOST/POSTGRES_PORT
+    POSTGRES_DIRECT_HOST: str = ""
+    POSTGRES_DIRECT_PORT: int = 5432
+    # seconds a starting worker waits for another process's migration before giving up
+    DB_MIGRATION_LOCK_TIMEOUT: float = 600
+    # optional read replica for SELECTs; credentials are shared with the primary, an empty host disables it
+    POSTGRES_REPLICA_HOST: str = ""
+    POSTGRES_REPLICA_PORT: int = 5432
+    POSTGRES_REPLICA_DB: str = ""
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2.0
+    DB_REPLICA_RETRY_INTERVAL: int = 30
+    # one transaction per request: DAO writes flush and the request commits once at the end
+    DB_UNIT_OF_WORK: bool = True
+
+    # user listing page size
+    USER_PAGE_SIZE_DEFAULT: int = 50
+    USER_PAGE_SIZE_MAX: int = 200
+    # rows fetched from the server-side cursor and written per chunk by the user export
+    USER_EXPORT_CHUNK_SIZE: int = 1000
+    # rows per INSERT in UserDao.create_many/upsert_many; asyncpg caps a statement at 32767 parameters
+    USER_BULK_CHUNK_SIZE: int = 1000
+    # per-worker cache of user rows for UserDao lookups by id, email, username and sub. A write only
+    # invalidates the writing worker's entries: other workers may serve the old row (even a deleted
+    # user) for up to USER_CACHE_TTL seconds; register, confirm and login always read fresh rows
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 300
+    # seconds after a user write on this worker during which user rows read from the replica are not cached
+    USER_CACHE_REPLICA_LAG: float = 5
+
+    # seconds the Cognito JWKS document is reused before it is downloaded again
+    JWKS_CACHE_TTL: int = 3600
+    # timeout in seconds for the JWKS download
+    JWKS_HTTP_TIMEOUT: float = 5.0
+    # seconds an unknown kid is remembered, and minimum seconds between two JWKS downloads
+    JWKS_UNKNOWN_KID_TTL: int = 300
+    JWKS_MIN_REFRESH_INTERVAL: int = 10
+    # maximum number of verified access tokens kept in memory, 0 disables the cache
+    TOKEN_CACHE_SIZE: int = 10000
+    # "cognito" asks Cognito get_user on every request, "local_claims" trusts the verified JWT claims
+    AUTH_MODE: str = "cognito"
+    # local_claims mode: seconds a get_user result is reused per sub, and fraction of requests re-checked anyway
+    AUTH_USER_RECHECK_INTERVAL: int = 300
+    AUTH_USER_RECHECK_SAMPLE_RATE: float = 0.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    # Cognito group (cognito:groups claim) whose members may use the admin routes
+    ADMIN_GROUP: str = "admin"
+
+    # "aws" talks to Cognito, "local" uses the in-process stand-in from aws_wrapper/local_cognito.py
+    COGNITO_BACKEND: str = "aws"
+    LOCAL_COGNITO_CONFIRMATION_CODE: str = "123456"
+    # threads available for blocking Cognito (boto3) calls
+    COGNITO_MAX_WORKERS: int = 10
+    # botocore client: HTTP connection pool size, timeouts in seconds and retry policy (attempts include the first call)
+    COGNITO_MAX_POOL_CONNECTIONS: int = 10
+    COGNITO_CONNECT_TIMEOUT: float = 5
+    COGNITO_READ_TIMEOUT: float = 10
+    COGNITO_RETRY_MODE: str = "standard"
+    COGNITO_MAX_ATTEMPTS: int = 1
+    # circuit breaker per Cognito operation and retries on throttling / 5xx / connection errors,
+    # only throttling and connect failures for operations that change state (sign up, reset password)
+    COGNITO_BREAKER_FAILURE_THRESHOLD: int = 5
+    COGNITO_BREAKER_RESET_TIMEOUT: float = 30
+    COGNITO_CALL_RETRIES: int = 2
+    COGNITO_RETRY_BACKOFF_BASE: float = 0.1
+    COGNITO_RETRY_BACKOFF_MAX: float = 2
+    # every call adds RATIO retry tokens to a budget shared by all operations, capped at CAPACITY
+    COGNITO_RETRY_BUDGET_RATIO: float = 0.1
+    COGNITO_RETRY_BUDGET_CAPACITY: float = 10
 
     class Config:
         env_file = './.env'
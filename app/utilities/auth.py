@@ -1,44 +1,207 @@
-import os
-from dotenv import load_dotenv
+import asyncio
 from fastapi import HTTPException, Request, Depends
-import requests
+import httpx
 import re
+import random
+import hashlib
 import jwt
 from jwt.algorithms import RSAAlgorithm
 import json
+import time
 from datetime import datetime, timezone
 
 # from app.utilities.logger import logger
-from aws_wrapper.Cognito_wrapper import Cognito_wrapper
 from app.daos.user import UserDao
 
-from app.db import get_session
+from app.db import get_session, reads_from_replica, use_primary
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.utils import UtilsService
+from app.settings import settings
+from app.utilities.cache import TTLCache
+from app.utilities.cognito import cognito_obj
+from aws_wrapper import Cognito_wrapper as cognito_module
 # from app.utilities._entropy import validate as entropy_validate
 
-load_dotenv()
-
-region = os.getenv("REGION")
-user_pool_id = os.getenv("USER_POOL_ID")
+region = settings.REGION
+user_pool_id = settings.USER_POOL_ID
 keys_url = "https://cognito-idp.{}.amazonaws.com/{}/.well-known/jwks.json".format(region, user_pool_id)
 issuer = "https://cognito-idp.{}.amazonaws.com/{}".format(region, user_pool_id)
 
 
-def request_method(url: str) -> requests.Response:
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build the pooled keep-alive HTTP client used for JWKS downloads.
+
+    Returns:
+        httpx.AsyncClient: A client with the configured timeouts.
+    """
+    transport = None
+    if settings.COGNITO_BACKEND == "local":
+        # serve the key set of the in-process Cognito stand-in instead of going over the network
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=cognito_module.get_cognito_client().jwks()))
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.JWKS_HTTP_TIMEOUT),
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=2),
+        transport=transport,
+    )
+
+
+async def request_method(url: str, client: httpx.AsyncClient | None = None) -> httpx.Response:
     """
-    Make a GET request to the specified URL.
+    Make a GET request to the specified URL without blocking the event loop.
 
     Args:
         url (str): The URL to make the request to.
+        client (httpx.AsyncClient | None): The shared client, a short-lived one is used when None.
 
     Returns:
-        requests.Response: The response object.
+        httpx.Response: The response object.
     """
-    return requests.request("GET", url)
+    if client is None:
+        async with build_http_client() as client:
+            return await client.get(url)
+
+    return await client.get(url)
+
 
+class JWKSFetchError(Exception):
+    """Raised when the JSON Web Key Set could not be downloaded."""
 
-def verify_signature(access_token: str) -> dict:
+
+class JWKSStore:
+    """
+    In-memory cache of the Cognito JSON Web Key Set.
+
+    The key set is downloaded once and reused until `ttl` seconds have passed or a token
+    presents a `kid` that is not part of the cached set. Parsed public keys are kept per
+    `kid` so the RSA key is only built once for every key the set contains.
+
+    Concurrent refreshes are coalesced into a single download that every caller awaits.
+    A `kid` that is still unknown after a refresh is remembered for `unknown_kid_ttl`
+    seconds, and no refresh starts within `min_refresh_interval` seconds of the previous
+    one, so tokens with forged key ids cannot force a download per request.
+    """
+
+    def __init__(self, url: str, ttl: int, unknown_kid_ttl: int = 300, min_refresh_interval: int = 10) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        # set by the application lifespan, see app/lifespan.py
+        self.client: httpx.AsyncClient | None = None
+        self._keys: dict[str, dict] = {}
+        self._public_keys: dict[str, object] = {}
+        self._unknown_kids = TTLCache(maxsize=1024, ttl=unknown_kid_ttl)
+        self._fetched_at: float | None = None
+        self._attempted_at: float | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    def expired(self) -> bool:
+        return self._fetched_at is None or time.monotonic() - self._fetched_at >= self.ttl
+
+    def _recently_attempted(self) -> bool:
+        return self._attempted_at is not None and time.monotonic() - self._attempted_at < self.min_refresh_interval
+
+    async def refresh(self) -> None:
+        """
+        Download the key set and replace the cached keys, joining a download already in flight.
+
+        Raises:
+            JWKSFetchError: If the JWKS endpoint could not be reached or did not answer with status 200.
+        """
+        if self._refresh_task is None:
+            self._attempted_at = time.monotonic()
+            self._refresh_task = asyncio.ensure_future(self._download())
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+        # shield the shared download from callers that get cancelled while waiting
+        await asyncio.shield(self._refresh_task)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refresh_task = None
+        if not task.cancelled():
+            # mark the exception as retrieved when every waiter went away
+            task.exception()
+
+    async def _download(self) -> None:
+        try:
+            key_response = await request_method(self.url, self.client)
+        except httpx.HTTPError as exp:
+            raise JWKSFetchError(f"Failed to fetch JWK. {exp}") from exp
+
+        if key_response.status_code != 200:
+            raise JWKSFetchError(f"Failed to fetch JWK. Status code: {key_response.status_code}")
+
+        keys = {key["kid"]: key for key in key_response.json()["keys"]}
+
+        # drop parsed keys that were rotated out or whose JWK changed
+        self._public_keys = {
+            kid: public_key for kid, public_key in self._public_keys.items() if keys.get(kid) == self._keys.get(kid)
+        }
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def get(self, kid: str) -> dict | None:
+        """
+        Return the JWK for `kid`, refreshing the key set if it is stale or `kid` is unknown.
+
+        Args:
+            kid (str): The key id from the token header.
+
+        Returns:
+            dict | None: The matching JWK, or None if the key set does not contain it.
+        """
+        known = kid in self._keys
+        if known and not self.expired():
+            return self._keys[kid]
+
+        if not known and self._unknown_kids.get(kid) is not None:
+            return None
+
+        if self._refresh_task is None and self._recently_attempted():
+            return self._keys.get(kid)
+
+        try:
+            await self.refresh()
+        except JWKSFetchError:
+            # keep serving the previous key set if it already knows this kid
+            if not known:
+                raise
+
+        if kid not in self._keys:
+            self._unknown_kids.set(kid, True)
+
+        return self._keys.get(kid)
+
+    def public_key(self, kid: str) -> object:
+        """
+        Return the parsed public key for `kid`, building it from the cached JWK on first use.
+
+        Args:
+            kid (str): The key id of a JWK previously returned by `get`.
+
+        Returns:
+            object: The RSA public key accepted by `jwt.decode`.
+        """
+        public_key = self._public_keys.get(kid)
+        if public_key is None:
+            public_key = RSAAlgorithm.from_jwk(json.dumps(self._keys[kid]))
+            self._public_keys[kid] = public_key
+
+        return public_key
+
+
+jwks_store = JWKSStore(
+    keys_url,
+    ttl=settings.JWKS_CACHE_TTL,
+    unknown_kid_ttl=settings.JWKS_UNKNOWN_KID_TTL,
+    min_refresh_interval=settings.JWKS_MIN_REFRESH_INTERVAL,
+)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
+user_info_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_RECHECK_INTERVAL)
+
+
+async def verify_signature(access_token: str) -> dict:
     """
     Verify the signature of the JWT access token.
 
@@ -48,27 +211,39 @@ def verify_signature(access_token: str) -> dict:
     Returns:
         dict: A dictionary containing the verified token information, including username and expiration.
     """
-    key_response = request_method(keys_url)
-
-    if key_response.status_code != 200:
-        return {"error": f"Failed to fetch JWK. Status code: {key_response.status_code}", "verified": False}
-
-    key_response = key_response.json()
     unverified_token_header = jwt.get_unverified_header(access_token)
 
-    jwk_value = next((x for x in key_response["keys"] if x["kid"] == unverified_token_header["kid"]), None)
+    try:
+        jwk_value = await jwks_store.get(unverified_token_header["kid"])
+    except JWKSFetchError as exp:
+        return {"error": str(exp), "verified": False}
 
     if jwk_value is None:
         return {"error": "Local id and public id Didn't matched", "verified": False}
 
-    public_key = RSAAlgorithm.from_jwk(json.dumps(jwk_value))
+    public_key = jwks_store.public_key(unverified_token_header["kid"])
 
     decoded_token = jwt.decode(access_token, public_key, algorithms=[jwk_value["alg"]], issuer=issuer)
 
     username = decoded_token.get("username", None)
+    sub = decoded_token.get("sub", None)
     exp = decoded_token.get("exp", None)
+    groups = decoded_token.get("cognito:groups", [])
 
-    return {"username": username, "exp": exp, "verified": True}
+    return {"username": username, "sub": sub, "exp": exp, "groups": groups, "verified": True}
+
+
+def token_cache_key(access_token: str) -> str:
+    """
+    Build the verified-token cache key, so raw tokens are never kept in memory as keys.
+
+    Args:
+        access_token (str): The JWT access token.
+
+    Returns:
+        str: The SHA-256 hex digest of the token.
+    """
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
 
 
 def return_email(value: list) -> str:
@@ -101,6 +276,56 @@ def token_expired(exp: int) -> bool:
     return exp < utc_timestamp
 
 
+async def fetch_user_info(access_token: str) -> dict:
+    """
+    Get the user info from Cognito for the given access token.
+
+    Args:
+        access_token (str): The JWT access token.
+
+    Returns:
+        dict: The Cognito `get_user` response.
+    """
+    try:
+        user_info = await cognito_obj.get_user(access_token)
+    except Exception as exp:
+        raise HTTPException(status_code=401, detail=f"Couldn't get user info from token. {exp}")
+
+    if user_info["ResponseMetadata"]["HTTPStatusCode"] != 200:
+        raise HTTPException(status_code=401, detail=f"Couldn't get user info from token. {user_info.get('message', '')}")
+
+    return user_info
+
+
+async def get_user_info(access_token: str, signature_value: dict) -> dict:
+    """
+    Get the Cognito user info for a verified token.
+
+    In the default `cognito` mode every call asks Cognito. In `local_claims` mode the verified
+    JWT claims are trusted and the `get_user` result is cached per `sub`: Cognito is asked again
+    once the entry is older than AUTH_USER_RECHECK_INTERVAL, or on a random
+    AUTH_USER_RECHECK_SAMPLE_RATE fraction of requests.
+
+    Args:
+        access_token (str): The JWT access token.
+        signature_value (dict): The verified token claims returned by `verify_signature`.
+
+    Returns:
+        dict: The Cognito `get_user` response.
+    """
+    if settings.AUTH_MODE != "local_claims":
+        return await fetch_user_info(access_token)
+
+    sub = signature_value["sub"]
+    user_info = user_info_cache.get(sub)
+
+    if user_info is None or random.random() < settings.AUTH_USER_RECHECK_SAMPLE_RATE:
+        user_info = await fetch_user_info(access_token)
+        user_info_cache.set(sub, user_info)
+
+    return user_info
+
+
 async def is_authenticated(request: Request, session: AsyncSession = Depends(get_session)) -> dict:
     """
     Authenticate the user based on the provided JWT access token.
@@ -121,26 +346,29 @@ async def is_authenticated(request: Request, session: AsyncSession = Depends(get
     if access_token is None:
         raise HTTPException(status_code=401, detail="Access Token missing")
 
-    # verify the signature of the access_token
-    try:
-        signature_value = verify_signature(access_token)
-    except Exception as exp:
-        raise HTTPException(status_code=401, detail=f"{exp}")
+    # reuse the claims of a token that was already verified, entries expire at the token's exp
+    token_key = token_cache_key(access_token)
+    signature_value = token_cache.get(token_key)
+
+    if signature_value is None:
+        # verify the signature of the access_token
+        try:
+            signature_value = await verify_signature(access_token)
+        except Exception as exp:
+            raise HTTPException(status_code=401, detail=f"{exp}")
 
-    # if siggature not verified raise exception
-    if not signature_value["verified"]:
-        raise HTTPException(status_code=401, detail=signature_value["error"])
+        # if siggature not verified raise exception
+        if not signature_value["verified"]:
+            raise HTTPException(status_code=401, detail=signature_value["error"])
 
-    # if token expired raise exception
-    if token_expired(signature_value["exp"]):
-        raise HTTPException(status_code=401, detail="Token Expired.")
+        # if token expired raise exception
+        if token_expired(signature_value["exp"]):
+            raise HTTPException(status_code=401, detail="Token Expired.")
+
+        token_cache.set(token_key, signature_value, expires_at=signature_value["exp"])
 
     # get the user info using cognito sdk for python to validate the user
-    cognito_obj = Cognito_wrapper()
-    try:
-        user_info = cognito_obj.get_user(access_token)
-    except Exception as exp:
-        raise HTTPException(status_code=401, detail=f"Couldn't get user info from token. {exp}")
+    user_info = await get_user_info(access_token, signature_value)
 
     # if signature username and the userinfo username not mached raise exception
     if signature_value["username"] != user_info["Username"]:
@@ -150,17 +378,42 @@ async def is_authenticated(request: Request, session: AsyncSession = Depends(get
     user_session_dao = UserDao(session)
     user = await user_session_dao.get_by_username(signature_value["username"])
 
+    # a user who just signed up may not have reached a lagging read replica yet
+    if user is None and reads_from_replica(session):
+        use_primary(session)
+        user = await user_session_dao.get_by_username(signature_value["username"])
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found.")
+
     authenticated_user = {
         "user_id": user.id,
         "username": signature_value["username"],
         "email": return_email(user_info.get("UserAttributes", [])),
         "exp": signature_value["exp"],
+        "groups": signature_value["groups"],
         "accessToken": access_token,
     }
 
     return authenticated_user
 
 
+async def is_admin(authenticated: dict = Depends(is_authenticated)) -> dict:
+    """
+    Authenticate the user and require membership of the ADMIN_GROUP Cognito group.
+
+    Args:
+        authenticated (dict): The user returned by `is_authenticated`.
+
+    Returns:
+        dict: The authenticated user information.
+    """
+    if settings.ADMIN_GROUP not in authenticated["groups"]:
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return authenticated
+
+
 def validate_password(password):
     # Check for minimum length
     if len(password) < 8:
@@ -0,0 +1,5 @@
+from app.settings import settings
+from aws_wrapper.Cognito_wrapper import AsyncCognitoWrapper
+
+# shared by every service so all Cognito calls go through one bounded thread pool
+cognito_obj = AsyncCognitoWrapper(max_workers=settings.COGNITO_MAX_WORKERS)
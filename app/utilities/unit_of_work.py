@@ -0,0 +1,37 @@
+from fastapi.routing import APIRoute
+
+import functools
+import inspect
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import complete_unit_of_work
+
+
+def commit_after(endpoint):
+    """Wrap an endpoint so the sessions it was given are committed before its response goes out."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        response = await endpoint(*args, **kwargs)
+        for value in kwargs.values():
+            if isinstance(value, AsyncSession) and value.info.get("unit_of_work"):
+                await complete_unit_of_work(value)
+        return response
+
+    return wrapper
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Route that commits the request's unit of work as soon as the endpoint returns.
+
+    `get_session` also commits after its yield, but depending on the FastAPI version that
+    teardown only runs once the response has been sent, when a failed commit can no longer
+    turn into an error response.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs) -> None:
+        super().__init__(path, commit_after(endpoint), **kwargs)
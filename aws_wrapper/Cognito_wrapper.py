@@ -1,33 +1,158 @@
-import boto3
-import os
-import boto3.exceptions
-from botocore.exceptions import ClientError
-from dotenv import load_dotenv
+import asyncio
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
 import hmac
 import hashlib
 import base64
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.settings import settings
+from aws_wrapper.circuit_breaker import CircuitBreaker, RetryBudget, backoff_delay
+from aws_wrapper.local_cognito import LocalCognitoClient
+from aws_wrapper.session import build_aws_session
+
+
+def build_cognito_client():
+    """
+    Build the cognito-idp client with the connection pool, timeouts and retry policy from settings.
+
+    With COGNITO_BACKEND=local an in-process LocalCognitoClient is returned instead, so the
+    auth flows run fully offline.
+    """
+    if settings.COGNITO_BACKEND == 'local':
+        return LocalCognitoClient(
+            issuer=f"https://cognito-idp.{settings.REGION}.amazonaws.com/{settings.USER_POOL_ID}",
+            client_id=settings.CLIENT_ID,
+            confirmation_code=settings.LOCAL_COGNITO_CONFIRMATION_CODE,
+        )
 
-load_dotenv()
+    # imported on first use with boto3, see build_aws_session
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=settings.COGNITO_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.COGNITO_CONNECT_TIMEOUT,
+        read_timeout=settings.COGNITO_READ_TIMEOUT,
+        retries={
+            'mode': settings.COGNITO_RETRY_MODE,
+            'total_max_attempts': settings.COGNITO_MAX_ATTEMPTS,
+        },
+    )
+    return build_aws_session().client('cognito-idp', config=config)
+
+
+_cognito_client = None
+_cognito_client_lock = threading.Lock()
+
+
+def get_cognito_client():
+    """Return the shared cognito-idp client, built on first use rather than at import time."""
+    global _cognito_client
+    if _cognito_client is None:
+        with _cognito_client_lock:
+            if _cognito_client is None:
+                _cognito_client = build_cognito_client()
+    return _cognito_client
+
+
+def http_pool_stats() -> dict:
+    """
+    Report how saturated the HTTP connection pools of the cognito-idp client are.
+
+    botocore does not expose its urllib3 pools publicly, so this reads them best effort and
+    returns an empty dict if the internals change.
+    """
+    try:
+        pools = _cognito_client._endpoint.http_session._manager.pools
+        stats = []
+        for key in pools.keys():
+            pool = pools[key]
+            in_use = pool.pool.maxsize - pool.pool.qsize()
+            stats.append({
+                'host': pool.host,
+                'maxsize': pool.pool.maxsize,
+                'in_use': in_use,
+                'saturation': in_use / pool.pool.maxsize if pool.pool.maxsize else 0.0,
+                'connections_opened': pool.num_connections,
+            })
+    except AttributeError:
+        return {}
+
+    return {'max_pool_connections': settings.COGNITO_MAX_POOL_CONNECTIONS, 'pools': stats}
+
+
+# error codes that mean Cognito is throttling, the request was rejected before it was processed
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+}
+
+# error codes that mean Cognito is throttling or degraded, as opposed to rejecting the request.
+# LimitExceededException is left out: it is the attempt limit of a single user, not an outage
+TRANSIENT_ERROR_CODES = THROTTLING_ERROR_CODES | {
+    'InternalErrorException',
+    'ServiceUnavailable',
+    'RequestTimeout',
+}
+
+# operations that change nothing, so a request that may already have reached Cognito (a read
+# timeout or a 5xx) can be sent again. Any other operation (sign_up, forgot_password, ...)
+# could be applied twice and is only retried when Cognito never got it or throttled it
+RETRY_AFTER_SEND_OPERATIONS = {
+    'get_user',
+    'initiate_auth',
+    'list_users',
+}
+
+circuit_breakers: dict[str, CircuitBreaker] = {}
+circuit_breakers_lock = threading.Lock()
+retry_budget = RetryBudget(ratio=settings.COGNITO_RETRY_BUDGET_RATIO, capacity=settings.COGNITO_RETRY_BUDGET_CAPACITY)
+
+
+def get_circuit_breaker(operation: str) -> CircuitBreaker:
+    with circuit_breakers_lock:
+        if operation not in circuit_breakers:
+            circuit_breakers[operation] = CircuitBreaker(
+                operation,
+                failure_threshold=settings.COGNITO_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.COGNITO_BREAKER_RESET_TIMEOUT,
+            )
+        return circuit_breakers[operation]
 
 
-AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-REGION = os.getenv("REGION")
+def is_transient_error(exp: Exception) -> bool:
+    if isinstance(exp, (BotoConnectionError, HTTPClientError)):
+        return True
 
+    if isinstance(exp, ClientError):
+        status_code = exp.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return exp.response.get('Error', {}).get('Code') in TRANSIENT_ERROR_CODES or status_code >= 500
 
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+    return False
 
-if AWS_ACCESS_KEY_ID != '' and AWS_SECRET_ACCESS_KEY != '':
-    session = boto3.Session(
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=REGION
-    )
-else:
-    session = boto3.Session()
 
-cognito_client = session.client('cognito-idp')
+def is_retryable_error(operation: str, exp: Exception) -> bool:
+    if operation in RETRY_AFTER_SEND_OPERATIONS:
+        return is_transient_error(exp)
+
+    # connect failures (refused, connect timeout, TLS handshake): the request was never sent
+    if isinstance(exp, BotoConnectionError):
+        return True
+
+    return isinstance(exp, ClientError) and exp.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+def circuit_breaker_stats() -> dict:
+    with circuit_breakers_lock:
+        breakers = dict(circuit_breakers)
+
+    return {
+        'circuit_breakers': {operation: breaker.stats() for operation, breaker in breakers.items()},
+        'retry_budget': retry_budget.stats(),
+    }
 
 
 class CognitoError(Exception):
@@ -45,6 +170,52 @@ class Cognito_wrapper():
         ).digest()
         return base64.b64encode(dig).decode()
 
+    def _call(self, operation: str, **kwargs) -> dict:
+        """
+        Call a cognito-idp operation through its circuit breaker.
+
+        Fails fast with CognitoError while the circuit is open. Throttling, 5xx and connection
+        errors count as failures of the operation and are retried with jittered backoff, at
+        most COGNITO_CALL_RETRIES times and only while the shared retry budget has tokens left.
+        Operations outside RETRY_AFTER_SEND_OPERATIONS are only retried on connect failures and
+        throttling, since a read timeout or a 5xx may come after Cognito applied the request.
+        Any other error is raised unchanged.
+
+        The backoff blocks in time.sleep on purpose: `_call` runs on an AsyncCognitoWrapper
+        executor thread, never on the event loop, and a sleeping worker also limits how many
+        calls reach a struggling Cognito at once.
+        """
+        breaker = get_circuit_breaker(operation)
+        retry_budget.deposit()
+        attempt = 0
+
+        while True:
+            if not breaker.allow():
+                raise CognitoError(f"Cognito {operation} is temporarily unavailable. Please try again later.")
+
+            try:
+                response = getattr(get_cognito_client(), operation)(**kwargs)
+            except Exception as exp:
+                if not is_transient_error(exp):
+                    # Cognito answered, the request itself was rejected
+                    breaker.record_success()
+                    raise
+
+                breaker.record_failure()
+                if (
+                    not is_retryable_error(operation, exp)
+                    or attempt >= settings.COGNITO_CALL_RETRIES
+                    or not retry_budget.withdraw()
+                ):
+                    raise
+
+                attempt += 1
+                time.sleep(backoff_delay(attempt, settings.COGNITO_RETRY_BACKOFF_BASE, settings.COGNITO_RETRY_BACKOFF_MAX))
+                continue
+
+            breaker.record_success()
+            return response
+
     def _generate_error(self, exp: str = None):
         response = {
             'ResponseMetadata': {
@@ -57,7 +228,8 @@ class Cognito_wrapper():
         return response
 
     def create_user_pool(self, user_pool_name: str):
-        response = cognito_client.create_user_pool(
+        response = self._call(
+            'create_user_pool',
             PoolName=user_pool_name
         )
         return response
@@ -66,7 +238,8 @@ class Cognito_wrapper():
         dicts = {
             'UserPoolId': user_pool_id
         }
-        response = cognito_client.delete_user_pool(
+        response = self._call(
+            'delete_user_pool',
             **dicts
         )
         return response
@@ -80,7 +253,8 @@ class Cognito_wrapper():
             'Precedence': precedence
         }
 
-        response = cognito_client.create_group(
+        response = self._call(
+            'create_group',
             **dicts
         )
 
@@ -92,7 +266,8 @@ class Cognito_wrapper():
             'UserPoolId': user_pool_id
         }
 
-        respones = cognito_client.delete_group(
+        respones = self._call(
+            'delete_group',
             **dicts
         )
 
@@ -107,7 +282,8 @@ class Cognito_wrapper():
         if password is not None:
             dicts['TemporaryPassword'] = password
 
-        response = cognito_client.admin_create_user(
+        response = self._call(
+            'admin_create_user',
             **dicts
         )
 
@@ -119,7 +295,8 @@ class Cognito_wrapper():
             'Username': username
         }
 
-        response = cognito_client.admin_delete_user(
+        response = self._call(
+            'admin_delete_user',
             **dicts
         )
 
@@ -132,7 +309,8 @@ class Cognito_wrapper():
             'GroupName': group_name
         }
 
-        response = cognito_client.admin_add_user_to_group(
+        response = self._call(
+            'admin_add_user_to_group',
             **dicts
         )
 
@@ -145,7 +323,8 @@ class Cognito_wrapper():
             'GroupName': group_name
         }
 
-        response = cognito_client.admin_remove_user_from_group(
+        response = self._call(
+            'admin_remove_user_from_group',
             **dicts
         )
 
@@ -157,7 +336,8 @@ class Cognito_wrapper():
             'Username': username
         }
 
-        response = cognito_client.admin_disable_user(
+        response = self._call(
+            'admin_disable_user',
             **dicts
         )
 
@@ -169,7 +349,8 @@ class Cognito_wrapper():
             'Username': username
         }
 
-        response = cognito_client.admin_enable_user(
+        response = self._call(
+            'admin_enable_user',
             **dicts
         )
 
@@ -194,7 +375,8 @@ class Cognito_wrapper():
                 'SECRET_HASH': secret_hash
             }
         try:
-            response = cognito_client.initiate_auth(
+            response = self._call(
+                'initiate_auth',
                 **dicts
             )
 
@@ -236,7 +418,8 @@ class Cognito_wrapper():
                     }
                 )
         try:
-            response = cognito_client.sign_up(
+            response = self._call(
+                'sign_up',
                 **dicts
             )
 
@@ -257,7 +440,8 @@ class Cognito_wrapper():
         }
 
         try:
-            response = cognito_client.confirm_sign_up(
+            response = self._call(
+                'confirm_sign_up',
                 **dicts
             )
         except Exception as exp:
@@ -273,7 +457,8 @@ class Cognito_wrapper():
         }
 
         try:
-            response = cognito_client.resend_confirmation_code(
+            response = self._call(
+                'resend_confirmation_code',
                 **dicts
             )
         except Exception as exp:
@@ -286,7 +471,8 @@ class Cognito_wrapper():
             'AccessToken': access_token
         }
         try:
-            response = cognito_client.get_user(
+            response = self._call(
+                'get_user',
                 **dicts
             )
 
@@ -300,7 +486,8 @@ class Cognito_wrapper():
             'UserPoolId': user_pool_id
         }
         try:
-            response = cognito_client.list_users(
+            response = self._call(
+                'list_users',
                 **dicts
             )
 
@@ -317,7 +504,8 @@ class Cognito_wrapper():
         }
 
         try:
-            response = cognito_client.change_password(
+            response = self._call(
+                'change_password',
                 **dicts
             )
         except Exception as exp:
@@ -333,7 +521,8 @@ class Cognito_wrapper():
         }
 
         try:
-            response = cognito_client.forgot_password(
+            response = self._call(
+                'forgot_password',
                 **dicts
             )
         except Exception as exp:
@@ -351,7 +540,8 @@ class Cognito_wrapper():
         }
 
         try:
-            response = cognito_client.confirm_forgot_password(
+            response = self._call(
+                'confirm_forgot_password',
                 **dicts
             )
         except Exception as exp:
@@ -360,9 +550,79 @@ class Cognito_wrapper():
         return response
 
 
+class AsyncCognitoWrapper:
+    """
+    Awaitable facade over `Cognito_wrapper`.
+
+    Every public method of the wrapper is available with the same arguments, but runs on a
+    bounded thread pool so the blocking boto3 call does not stall the event loop.
+    `Cognito_wrapper` itself keeps its synchronous API.
+    """
+
+    def __init__(self, max_workers: int = 10, wrapper: Cognito_wrapper = None) -> None:
+        self.wrapper = wrapper if wrapper is not None else Cognito_wrapper()
+        self.max_workers = max_workers
+        self.executor = self._build_executor()
+        self._shut_down = False
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_active = 0
+
+    def _build_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cognito")
+
+    def _run(self, method, *args, **kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.wrapper, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                self.queued += 1
+            return await loop.run_in_executor(self.executor, functools.partial(self._run, attribute, *args, **kwargs))
+
+        return call
+
+    def start(self) -> None:
+        """Replace the thread pool closed by `shutdown`, so the app can start again in the same process."""
+        with self._lock:
+            if self._shut_down:
+                self.executor = self._build_executor()
+                self._shut_down = False
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._shut_down = True
+            self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            'max_workers': self.max_workers,
+            'active': self.active,
+            'queued': self.queued,
+            'max_active': self.max_active,
+            'http_pool': http_pool_stats(),
+            **circuit_breaker_stats(),
+        }
+
+
 if __name__ == '__main__':
     # user_pool_name = 'testing-user-pool-polymorphisma'
-    user_pool_id = os.getenv('USER_POOL_ID')
+    user_pool_id = settings.USER_POOL_ID
     username = 'meshrawan'
     password = 'test@passwaoraAd1'
 
@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Per-operation circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail fast.
+    Once `reset_timeout` seconds have passed a single probe call is let through (half open):
+    its success closes the circuit again, its failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket shared by all operations that caps retries to a fraction of the call volume.
+
+    Every call deposits `ratio` tokens, every retry withdraws one. The bucket holds at most
+    `capacity` tokens, so during an outage retries stop once the saved-up tokens are spent
+    instead of multiplying the load on the failing service.
+    """
+
+    def __init__(self, ratio: float = 0.1, capacity: float = 10) -> None:
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                self.exhausted += 1
+                return False
+
+            self.tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> dict:
+        return {
+            'tokens': round(self.tokens, 2),
+            'capacity': self.capacity,
+            'retries': self.retries,
+            'exhausted': self.exhausted,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (starting at 1)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
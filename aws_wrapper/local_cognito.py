@@ -0,0 +1,233 @@
+import hashlib
+import json
+import secrets
+import threading
+import time
+import uuid
+
+import jwt
+from botocore.exceptions import ClientError
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+
+class LocalCognitoClient:
+    """
+    In-process stand-in for the cognito-idp client, for load tests and offline benchmarks.
+
+    Implements the subset of operations `Cognito_wrapper` uses with the same request and
+    response shapes as boto3, raising `ClientError` with Cognito's error codes. Tokens are
+    RS256 JWTs signed with a key generated at start-up and published through `jwks()`, so
+    `verify_signature` checks them exactly like real Cognito tokens.
+
+    Users only live in memory: every process has its own users and signing key, so run a
+    single worker when using it.
+    """
+
+    def __init__(self, issuer: str, client_id: str, confirmation_code: str = '123456', token_ttl: int = 3600) -> None:
+        self.issuer = issuer
+        self.client_id = client_id
+        self.confirmation_code = confirmation_code
+        self.token_ttl = token_ttl
+        self.kid = uuid.uuid4().hex
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._users: dict[str, dict] = {}
+        self._refresh_tokens: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def jwks(self) -> dict:
+        jwk_value = json.loads(RSAAlgorithm.to_jwk(self._private_key.public_key()))
+        jwk_value.update({'kid': self.kid, 'alg': 'RS256', 'use': 'sig'})
+        return {'keys': [jwk_value]}
+
+    def _response(self, **values) -> dict:
+        return {**values, 'ResponseMetadata': {'RequestId': str(uuid.uuid4()), 'HTTPStatusCode': 200}}
+
+    def _error(self, code: str, message: str, operation: str) -> ClientError:
+        return ClientError(
+            {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': 400}},
+            operation,
+        )
+
+    def _hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+    def _find_user(self, username: str, operation: str) -> dict:
+        # Cognito accepts the email alias wherever a username is expected
+        user = self._users.get(username) or next(
+            (user for user in self._users.values() if user['attributes'].get('email') == username), None
+        )
+        if user is None:
+            raise self._error('UserNotFoundException', 'User does not exist.', operation)
+        return user
+
+    def _user_from_token(self, access_token: str, operation: str) -> dict:
+        try:
+            claims = jwt.decode(
+                access_token, self._private_key.public_key(), algorithms=['RS256'], issuer=self.issuer
+            )
+        except jwt.PyJWTError:
+            raise self._error('NotAuthorizedException', 'Invalid Access Token', operation)
+
+        return self._find_user(claims['username'], operation)
+
+    def _issue_tokens(self, user: dict, refresh_token: str = None) -> dict:
+        now = int(time.time())
+        headers = {'kid': self.kid}
+        # like Cognito, the claim is only present for users in at least one group
+        groups = {'cognito:groups': list(user['groups'])} if user['groups'] else {}
+        access_token = jwt.encode({
+            **groups,
+            'sub': user['sub'],
+            'iss': self.issuer,
+            'client_id': self.client_id,
+            'token_use': 'access',
+            'scope': 'aws.cognito.signin.user.admin',
+            'auth_time': now,
+            'iat': now,
+            'exp': now + self.token_ttl,
+            'jti': str(uuid.uuid4()),
+            'username': user['username'],
+        }, self._private_key, algorithm='RS256', headers=headers)
+        id_token = jwt.encode({
+            'sub': user['sub'],
+            'iss': self.issuer,
+            'aud': self.client_id,
+            'token_use': 'id',
+            'auth_time': now,
+            'iat': now,
+            'exp': now + self.token_ttl,
+            'cognito:username': user['username'],
+            'email': user['attributes'].get('email', ''),
+            'email_verified': user['confirmed'],
+        }, self._private_key, algorithm='RS256', headers=headers)
+
+        result = {
+            'AccessToken': access_token,
+            'ExpiresIn': self.token_ttl,
+            'TokenType': 'Bearer',
+            'IdToken': id_token,
+        }
+        if refresh_token is None:
+            refresh_token = secrets.token_urlsafe(48)
+            self._refresh_tokens[refresh_token] = user['username']
+            result['RefreshToken'] = refresh_token
+
+        return result
+
+    def sign_up(self, ClientId: str, Username: str, Password: str, SecretHash: str = '', UserAttributes: list = None):
+        with self._lock:
+            if Username in self._users:
+                raise self._error('UsernameExistsException', 'User already exists', 'SignUp')
+
+            user = {
+                'username': Username,
+                'sub': str(uuid.uuid4()),
+                'password': self._hash(Password),
+                'attributes': {attribute['Name']: attribute['Value'] for attribute in UserAttributes or []},
+                'confirmed': False,
+                'reset_pending': False,
+                'groups': [],
+            }
+            self._users[Username] = user
+
+        return self._response(UserConfirmed=False, UserSub=user['sub'])
+
+    def confirm_sign_up(self, ClientId: str, Username: str, ConfirmationCode: str, SecretHash: str = ''):
+        with self._lock:
+            user = self._find_user(Username, 'ConfirmSignUp')
+            if ConfirmationCode != self.confirmation_code:
+                raise self._error('CodeMismatchException', 'Invalid verification code provided, please try again.',
+                                  'ConfirmSignUp')
+            user['confirmed'] = True
+
+        return self._response()
+
+    def resend_confirmation_code(self, ClientId: str, Username: str, SecretHash: str = ''):
+        with self._lock:
+            user = self._find_user(Username, 'ResendConfirmationCode')
+
+        return self._response(CodeDeliveryDetails={
+            'Destination': user['attributes'].get('email', ''),
+            'DeliveryMedium': 'EMAIL',
+            'AttributeName': 'email',
+        })
+
+    def initiate_auth(self, AuthFlow: str, ClientId: str, AuthParameters: dict = None):
+        parameters = AuthParameters or {}
+        with self._lock:
+            if AuthFlow == 'USER_PASSWORD_AUTH':
+                try:
+                    user = self._find_user(parameters.get('USERNAME', ''), 'InitiateAuth')
+                except ClientError:
+                    raise self._error('NotAuthorizedException', 'Incorrect username or password.', 'InitiateAuth')
+
+                if user['password'] != self._hash(parameters.get('PASSWORD', '')):
+                    raise self._error('NotAuthorizedException', 'Incorrect username or password.', 'InitiateAuth')
+                if not user['confirmed']:
+                    raise self._error('UserNotConfirmedException', 'User is not confirmed.', 'InitiateAuth')
+
+                return self._response(ChallengeParameters={}, AuthenticationResult=self._issue_tokens(user))
+
+            if AuthFlow == 'REFRESH_TOKEN_AUTH':
+                refresh_token = parameters.get('REFRESH_TOKEN', '')
+                username = self._refresh_tokens.get(refresh_token)
+                if username is None:
+                    raise self._error('NotAuthorizedException', 'Invalid Refresh Token', 'InitiateAuth')
+
+                user = self._find_user(username, 'InitiateAuth')
+                return self._response(
+                    ChallengeParameters={}, AuthenticationResult=self._issue_tokens(user, refresh_token=refresh_token)
+                )
+
+        raise self._error('InvalidParameterException', f'Unsupported auth flow: {AuthFlow}', 'InitiateAuth')
+
+    def get_user(self, AccessToken: str):
+        with self._lock:
+            user = self._user_from_token(AccessToken, 'GetUser')
+
+        attributes = {**user['attributes'], 'sub': user['sub'], 'email_verified': str(user['confirmed']).lower()}
+        return self._response(
+            Username=user['username'],
+            UserAttributes=[{'Name': name, 'Value': value} for name, value in attributes.items()],
+        )
+
+    def change_password(self, PreviousPassword: str, ProposedPassword: str, AccessToken: str):
+        with self._lock:
+            user = self._user_from_token(AccessToken, 'ChangePassword')
+            if user['password'] != self._hash(PreviousPassword):
+                raise self._error('NotAuthorizedException', 'Incorrect username or password.', 'ChangePassword')
+            user['password'] = self._hash(ProposedPassword)
+
+        return self._response()
+
+    def forgot_password(self, ClientId: str, Username: str, SecretHash: str = ''):
+        with self._lock:
+            user = self._find_user(Username, 'ForgotPassword')
+            user['reset_pending'] = True
+
+        return self._response(CodeDeliveryDetails={
+            'Destination': user['attributes'].get('email', ''),
+            'DeliveryMedium': 'EMAIL',
+            'AttributeName': 'email',
+        })
+
+    def confirm_forgot_password(self, ClientId: str, Username: str, ConfirmationCode: str, Password: str,
+                                SecretHash: str = ''):
+        with self._lock:
+            user = self._find_user(Username, 'ConfirmForgotPassword')
+            if not user['reset_pending'] or ConfirmationCode != self.confirmation_code:
+                raise self._error('CodeMismatchException', 'Invalid verification code provided, please try again.',
+                                  'ConfirmForgotPassword')
+            user['password'] = self._hash(Password)
+            user['reset_pending'] = False
+
+        return self._response()
+
+    def admin_add_user_to_group(self, UserPoolId: str, Username: str, GroupName: str):
+        with self._lock:
+            user = self._find_user(Username, 'AdminAddUserToGroup')
+            if GroupName not in user['groups']:
+                user['groups'].append(GroupName)
+
+        return self._response()
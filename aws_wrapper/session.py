@@ -0,0 +1,18 @@
+from app.settings import settings
+
+
+def build_aws_session():
+    """
+    Build the boto3 session every AWS client of the app is created from.
+
+    Uses AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY from settings when they are set, otherwise
+    boto3's default credential chain (instance or task role, ~/.aws), always in REGION.
+    """
+    # boto3 takes ~150 ms to import, paid on first use instead of at app import
+    import boto3
+
+    return boto3.Session(
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+        region_name=settings.REGION
+    )
@@ -0,0 +1,73 @@
+"""
+Benchmark user write throughput: per-row `UserDao.create` against `UserDao.upsert_many`.
+
+Runs against the database configured in .env. Each path writes `count` throw-away users and
+reports rows per second; the bulk path then upserts the same users again to time the
+ON CONFLICT (sub) DO UPDATE branch. The seeded users are deleted at the end.
+
+Usage:
+    python scripts/bench_bulk_upsert.py [count] [chunk_size]
+"""
+import asyncio
+import sys
+import time
+import uuid
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+from sqlalchemy import delete
+
+from app.daos.user import UserDao
+from app.db import AsyncSessionFactory, engine
+from app.models.user import User
+from app.settings import settings
+
+PREFIX = "bulk-bench-"
+
+
+def make_users(count: int) -> list[dict]:
+    users = []
+    for _ in range(count):
+        username = PREFIX + uuid.uuid4().hex[:12]
+        users.append({"username": username, "sub": str(uuid.uuid4()), "name": "bench", "email": f"{username}@example.com"})
+    return users
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<36} {count:7d} rows in {elapsed:7.2f} s   {count / elapsed:10.0f} rows/s")
+
+
+async def main(count: int, chunk_size: int) -> None:
+    try:
+        users = make_users(count)
+        async with AsyncSessionFactory() as session:
+            user_dao = UserDao(session)
+            start = time.perf_counter()
+            for user in users:
+                await user_dao.create(user)
+            report("per-row create", count, time.perf_counter() - start)
+
+        users = make_users(count)
+        async with AsyncSessionFactory() as session:
+            user_dao = UserDao(session)
+            start = time.perf_counter()
+            ids = await user_dao.upsert_many(users, chunk_size)
+            report(f"upsert_many, insert (chunk {chunk_size})", len(ids), time.perf_counter() - start)
+
+            for user in users:
+                user["name"] = "bench-updated"
+            start = time.perf_counter()
+            ids = await user_dao.upsert_many(users, chunk_size)
+            report(f"upsert_many, update (chunk {chunk_size})", len(ids), time.perf_counter() - start)
+    finally:
+        async with AsyncSessionFactory() as session:
+            await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else settings.USER_BULK_CHUNK_SIZE,
+    ))
@@ -0,0 +1,69 @@
+"""
+Load test showing that concurrent logins no longer serialize on blocking Cognito calls.
+
+The boto3 client is replaced by a stub whose `initiate_auth` blocks for `delay` seconds and
+rejects the credentials, so `/api/v1/auth/login` answers without touching the database.
+`concurrency` logins are sent at once, first with a single Cognito worker thread (the
+previous, serialized behaviour) and then with COGNITO_MAX_WORKERS threads.
+
+Usage:
+    python scripts/bench_cognito_concurrency.py [concurrency] [delay]
+"""
+from fastapi import FastAPI
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+import httpx
+from botocore.exceptions import ClientError
+
+from app.routers.api_router import api_router
+from app.settings import settings
+from app.utilities import cognito
+from aws_wrapper import Cognito_wrapper as cognito_module
+
+
+class SlowCognitoClient:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    def initiate_auth(self, **kwargs):
+        time.sleep(self.delay)
+        raise ClientError({"Error": {"Code": "NotAuthorizedException", "Message": "Incorrect username or password."}},
+                          "InitiateAuth")
+
+
+async def run(app: FastAPI, concurrency: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/v1/auth/login", json={"email": f"user{i}@adex.ltd", "password": "x"})
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(response.json()["success"] is False for response in responses)
+    return elapsed
+
+
+async def main(concurrency: int, delay: float) -> None:
+    cognito_module._cognito_client = SlowCognitoClient(delay)
+    app = FastAPI()
+    app.include_router(api_router)
+
+    for workers in (1, settings.COGNITO_MAX_WORKERS):
+        cognito.cognito_obj.executor = ThreadPoolExecutor(max_workers=workers)
+        elapsed = await run(app, concurrency)
+        print(f"{concurrency} concurrent logins, {workers:>3} Cognito worker(s): {elapsed:.2f}s "
+              f"({concurrency / elapsed:.1f} logins/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.2,
+    ))
@@ -0,0 +1,85 @@
+"""
+Measure cold-start cost: app import time, lifespan startup and the first requests.
+
+Every run happens in a fresh interpreter, like a newly scheduled container. Each run reports:
+- the time to import `app.__main__`;
+- the time to enter the lifespan;
+- the latency of the first request to /api/v1/test/;
+- the time of the first Cognito client use.
+Neither the database nor AWS is needed: the lifespan runs with ENVIRONMENT=development, which
+skips migrations, and a failed startup warmup is only logged. With a database and the JWKS
+reachable, startup includes opening the pool connections and downloading the key set. The medians
+of `runs` runs are printed, so results can be compared across commits.
+
+Usage:
+    python scripts/bench_cold_start.py [runs]
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# puts the project root on sys.path and sets placeholder settings, inherited by the child runs
+import bench_env
+
+
+def measure() -> dict:
+    """Runs in the child interpreter."""
+    os.chdir(bench_env.PROJECT_ROOT)
+
+    start = time.perf_counter()
+    import httpx
+
+    from app.__main__ import app
+    imported = time.perf_counter()
+
+    from aws_wrapper import Cognito_wrapper as cognito_module
+
+    async def first_requests() -> dict:
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get("/api/v1/test/")
+                response.raise_for_status()
+            requested = time.perf_counter()
+
+            client_start = time.perf_counter()
+            cognito_module.get_cognito_client()
+            client_built = time.perf_counter()
+
+        return {
+            "startup": started - imported,
+            "first_request": requested - started,
+            "first_cognito_client": client_built - client_start,
+        }
+
+    timings = asyncio.run(first_requests())
+    return {"import": imported - start, **timings}
+
+
+def main(runs: int) -> None:
+    env = dict(os.environ)
+    env["ENVIRONMENT"] = "development"
+
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in results[0]:
+        values = [result[key] * 1000 for result in results]
+        print(f"{key:<22} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(measure()))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,40 @@
+"""
+Shared setup for the scripts under scripts/.
+
+Importing this module puts the project root on `sys.path` and gives every setting without a
+default a placeholder value, so `app.settings` loads without a database or AWS account. Values
+already set in the environment or in the .env file that `Settings` reads are kept, so the
+scripts that need a database still use the configured one.
+
+Usage, at the top of a script and before any `app` import:
+    import bench_env  # noqa: F401
+"""
+import os
+import sys
+
+from dotenv import dotenv_values
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLACEHOLDER_SETTINGS = {
+    **dict.fromkeys(
+        ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST", "POSTGRES_DB", "POSTGRES_URL", "CLIENT_ID",
+         "CLIENT_SECRET", "USER_POOL_ID", "SENDER_MAIL", "SERVICE_NAME", "ENVIRONMENT"),
+        "bench",
+    ),
+    "POSTGRES_PORT": "5432",
+    # botocore needs a real region name to build a client
+    "REGION": "us-east-1",
+}
+
+
+def set_placeholders(environ: dict) -> None:
+    # environment variables take precedence over .env in Settings, a placeholder would hide its value
+    configured = dotenv_values("./.env")
+    for name, value in PLACEHOLDER_SETTINGS.items():
+        if name not in configured:
+            environ.setdefault(name, value)
+
+
+sys.path.insert(0, PROJECT_ROOT)
+set_placeholders(os.environ)
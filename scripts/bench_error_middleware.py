@@ -0,0 +1,119 @@
+"""
+Benchmark the application error middleware: requests per second on /api/v1/test/.
+
+Three copies of the app are built from the API router, each with the CORS middleware outermost:
+- without an error middleware;
+- with the previous `app.middleware('http')` error handler (BaseHTTPMiddleware);
+- with `ApplicationErrorMiddleware`.
+Requests are sent straight to the ASGI app by `concurrency` concurrent clients, so the figures show
+the cost of the middleware stack without server or network noise. Before timing, the script
+checks that both error middlewares answer /api/v1/test/error with the same status and JSON.
+
+Usage:
+    python scripts/bench_error_middleware.py [requests] [concurrency]
+"""
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+import asyncio
+import sys
+import time
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+
+from app.exception import ApplicationErrorMiddleware
+from app.routers.api_router import api_router
+
+
+async def previous_application_level_error(request: Request, call_next):
+    """The error handler as it was registered with app.middleware('http')."""
+    try:
+        return await call_next(request)
+    except Exception:
+        return JSONResponse(
+            {
+                "success": False,
+                "message": "An unexpected error occurred while processing your request. "
+                           "Our team has been notified and is working to resolve the issue. "
+                           "Please try again later."
+            },
+            status_code=500
+        )
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+    if variant == "base-http":
+        app.middleware('http')(previous_application_level_error)
+    elif variant == "pure-asgi":
+        app.add_middleware(ApplicationErrorMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(api_router)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> tuple[int, bytes]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost:5173")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    status, body = 0, b""
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status, body
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return status, body
+
+
+async def requests_per_second(app: FastAPI, count: int, concurrency: int) -> float:
+    async def client(requests: int) -> None:
+        for _ in range(requests):
+            status, _ = await call(app, "/api/v1/test/")
+            assert status == 200, status
+
+    # warm up the routing and serialization paths first
+    await asyncio.gather(*(client(10) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(count // concurrency) for _ in range(concurrency)))
+    return count // concurrency * concurrency / (time.perf_counter() - start)
+
+
+async def main(count: int, concurrency: int) -> None:
+    apps = {variant: build_app(variant) for variant in ("none", "base-http", "pure-asgi")}
+
+    previous = await call(apps["base-http"], "/api/v1/test/error")
+    current = await call(apps["pure-asgi"], "/api/v1/test/error")
+    print(f"error response: {current[0]} {current[1].decode()}")
+    if previous != current:
+        print(f"error responses differ: base-http {previous} vs pure-asgi {current}")
+        sys.exit(1)
+
+    for variant, app in apps.items():
+        rps = await requests_per_second(app, count, concurrency)
+        print(f"{variant:<10} {rps:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    ))
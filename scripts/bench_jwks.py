@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for the per-request cost of turning a JWKS entry into a verified token.
+
+Compares the previous path, which rebuilt the RSA public key from the JWK on every request,
+with the cached path through `JWKSStore.public_key`. No network access is needed: the JWKS
+download is replaced by an in-memory document.
+
+Usage:
+    python scripts/bench_jwks.py [iterations]
+"""
+import asyncio
+import json
+import sys
+import time
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.utilities import auth
+
+KID = "bench-kid"
+
+
+def build_token() -> tuple[str, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk_value = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk_value.update({"kid": KID, "alg": "RS256", "use": "sig"})
+
+    token = jwt.encode(
+        {"username": "bench", "exp": int(time.time()) + 3600, "iss": auth.issuer},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+    return token, jwk_value
+
+
+async def timed(label: str, func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+    per_call = (time.perf_counter() - start) / iterations * 1_000_000
+    print(f"{label:<42} {per_call:10.1f} us/request")
+    return per_call
+
+
+async def main(iterations: int) -> None:
+    token, jwk_value = build_token()
+    auth.jwks_store = auth.JWKSStore(auth.keys_url, ttl=3600)
+    auth.jwks_store.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"keys": [jwk_value]}))
+    )
+
+    def key_uncached():
+        RSAAlgorithm.from_jwk(json.dumps(jwk_value))
+
+    def key_cached():
+        auth.jwks_store.public_key(KID)
+
+    def verify_uncached():
+        jwt.get_unverified_header(token)
+        public_key = RSAAlgorithm.from_jwk(json.dumps(jwk_value))
+        jwt.decode(token, public_key, algorithms=[jwk_value["alg"]], issuer=auth.issuer)
+
+    def verify_cached():
+        return auth.verify_signature(token)
+
+    await auth.verify_signature(token)
+
+    print("public key lookup")
+    before = await timed("  from_jwk(json.dumps(jwk)) (before)", key_uncached, iterations)
+    after = await timed("  JWKSStore.public_key (after)", key_cached, iterations)
+    print(f"  saved per request: {before - after:.1f} us")
+
+    print("full signature verification")
+    before = await timed("  rebuild key every request (before)", verify_uncached, iterations)
+    after = await timed("  verify_signature (after)", verify_cached, iterations)
+    print(f"  saved per request: {before - after:.1f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,82 @@
+"""
+Count database round trips per UserDao write call.
+
+Runs against the database configured in .env. A throw-away user is created, then the
+previous SELECT + UPDATE + COMMIT + refresh pattern is compared with the UPDATE/DELETE ...
+RETURNING methods. Every statement, BEGIN and COMMIT sent to Postgres counts as one round trip.
+
+Usage:
+    python scripts/bench_round_trips.py
+"""
+import asyncio
+import uuid
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+from sqlalchemy import delete, event, select
+
+from app.daos.user import UserDao
+from app.db import AsyncSessionFactory, engine
+from app.models.user import User
+
+
+class RoundTripCounter:
+    def __init__(self) -> None:
+        self.count = 0
+        for name in ("before_cursor_execute", "begin", "commit"):
+            event.listen(engine.sync_engine, name, self._increment)
+
+    def _increment(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    async def measure(self, label: str, coroutine_function) -> None:
+        async with AsyncSessionFactory() as session:
+            start = self.count
+            await coroutine_function(session)
+            print(f"{label:<52} {self.count - start:3d} round trips")
+
+
+async def legacy_update(session, username: str, **values) -> None:
+    # the pattern UserDao used before: one SELECT, UPDATE, COMMIT and refresh per field
+    for field, value in values.items():
+        _user = await session.scalar(select(User).where(User.username == username))
+        setattr(_user, field, value)
+        session.add(_user)
+        await session.commit()
+        await session.refresh(_user)
+
+
+async def legacy_delete(session, user_id: int) -> None:
+    await session.scalar(select(User).where(User.id == user_id))
+    await session.execute(delete(User).where(User.id == user_id))
+    await session.commit()
+
+
+async def main() -> None:
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    async with AsyncSessionFactory() as session:
+        user = await UserDao(session).create({
+            "username": username, "sub": str(uuid.uuid4()), "name": "bench", "email": f"{username}@example.com",
+        })
+        user_id = user.id
+
+    counter = RoundTripCounter()
+    salt = uuid.uuid4().hex
+
+    await counter.measure(
+        "confirm signup, before (email_verified + salt)",
+        lambda session: legacy_update(session, username, email_verified=True, salt=salt),
+    )
+    await counter.measure(
+        "confirm signup, after (UserDao.confirm_user)",
+        lambda session: UserDao(session).confirm_user(username, uuid.uuid4().hex),
+    )
+    await counter.measure("update_salt, after", lambda session: UserDao(session).update_salt(username, uuid.uuid4().hex))
+    await counter.measure("delete by id, before (SELECT + DELETE)", lambda session: legacy_delete(session, -1))
+    await counter.measure("delete_by_id, after (DELETE ... RETURNING)", lambda session: UserDao(session).delete_by_id(user_id))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
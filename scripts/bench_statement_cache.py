@@ -0,0 +1,57 @@
+"""
+Benchmark per-query latency of `UserDao.get_by_email` with the prepared statement cache on and off.
+
+Runs against the database configured in .env. Each variant gets its own engine, warms up,
+then times `iterations` lookups on one session. The PgBouncer variant uses the same options
+the app uses with DB_PGBOUNCER_MODE=true (no statement caches, unique statement names).
+
+Usage:
+    python scripts/bench_statement_cache.py [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+# puts the project root on sys.path and sets placeholder settings
+import bench_env  # noqa: F401
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.daos.user import UserDao
+from app.db import engine_options, postgres_url
+
+VARIANTS = [
+    ("statement cache on (100)", False, 100),
+    ("statement cache off", False, 0),
+    ("pgbouncer mode, cache off", True, 0),
+]
+
+
+async def bench(pgbouncer_mode: bool, cache_size: int, iterations: int) -> list[float]:
+    engine = create_async_engine(postgres_url, **engine_options(pgbouncer_mode, cache_size))
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    latencies = []
+    async with session_factory() as session:
+        user_dao = UserDao(session)
+        for _ in range(20):
+            await user_dao.get_by_email("bench@example.com")
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await user_dao.get_by_email("bench@example.com")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await engine.dispose()
+    return latencies
+
+
+async def main(iterations: int) -> None:
+    for label, pgbouncer_mode, cache_size in VARIANTS:
+        latencies = await bench(pgbouncer_mode, cache_size, iterations)
+        p95 = statistics.quantiles(latencies, n=20)[18]
+        print(f"{label:<28} median {statistics.median(latencies):6.3f} ms   p95 {p95:6.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
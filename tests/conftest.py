@@ -0,0 +1,89 @@
+"""
+Shared test setup.
+
+Settings without a default get placeholder values and Cognito is replaced by the in-process
+stand-in, so tests that need no database run anywhere. Tests that use the `database` fixture
+run against the Postgres configured through the POSTGRES_* variables, which the first of them
+migrates to head, and are skipped when it cannot be reached.
+"""
+import os
+import uuid
+
+for name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST", "POSTGRES_DB", "POSTGRES_URL", "CLIENT_ID",
+             "CLIENT_SECRET", "USER_POOL_ID", "SENDER_MAIL", "SERVICE_NAME"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+os.environ.setdefault("REGION", "us-east-1")
+os.environ.setdefault("ENVIRONMENT", "development")
+os.environ["COGNITO_BACKEND"] = "local"
+
+from fastapi import FastAPI  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.db import dispose_engines, engine  # noqa: E402
+from app.lifespan import lifespan  # noqa: E402
+from app.routers.api_router import api_router  # noqa: E402
+from app.run_migration import run_migration  # noqa: E402
+from app.settings import settings  # noqa: E402
+from aws_wrapper import Cognito_wrapper as cognito_module  # noqa: E402
+
+PASSWORD = "Passw0rd!test"
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+_migrated = False
+
+
+@pytest.fixture
+async def database():
+    """Skip the test when the database is unreachable, migrate it once per run; close the pools after it."""
+    global _migrated
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except Exception as exp:
+        await dispose_engines()
+        pytest.skip(f"database not reachable: {exp}")
+
+    if not _migrated:
+        await run_migration()
+        _migrated = True
+
+    yield engine
+    # every test runs in its own event loop, pooled connections cannot outlive it
+    await dispose_engines()
+
+
+@pytest.fixture
+async def client(database):
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+async def sign_in(client: httpx.AsyncClient, groups: tuple[str, ...] = ()) -> str:
+    """Register, confirm and log in a new user, and return its access token."""
+    email = f"test-{uuid.uuid4().hex[:10]}@adex.ltd"
+    response = await client.post("/api/v1/auth/register", json={"email": email, "password": PASSWORD, "name": "Test"})
+    assert response.json()["success"], response.text
+    code = settings.LOCAL_COGNITO_CONFIRMATION_CODE
+    response = await client.post("/api/v1/auth/confirm-signup", json={"email": email, "code": code})
+    assert response.json()["success"], response.text
+
+    for group in groups:
+        cognito_module.get_cognito_client().admin_add_user_to_group(
+            UserPoolId=settings.USER_POOL_ID, Username=email, GroupName=group
+        )
+
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.json()["success"], response.text
+    return response.json()["data"]["AuthenticationResult"]["AccessToken"]
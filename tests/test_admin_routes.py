@@ -0,0 +1,49 @@
+import pytest
+
+from app.settings import settings
+from tests.conftest import sign_in
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_user_list_requires_admin_group(client):
+    token = await sign_in(client)
+    response = await client.get("/api/v1/user/list", headers={"Authorization": token})
+    assert response.status_code == 403
+
+    admin_token = await sign_in(client, groups=(settings.ADMIN_GROUP,))
+    response = await client.get("/api/v1/user/list", headers={"Authorization": admin_token})
+    assert response.status_code == 200
+    assert response.json()["success"]
+
+
+@pytest.mark.parametrize("cursor", ["eyJpZCI6dHJ1ZX0", "eyJpZCI6MTAwMDAwMDAwMDAwMH0", "not base64!"])
+async def test_user_list_rejects_a_tampered_cursor(client, cursor):
+    admin_token = await sign_in(client, groups=(settings.ADMIN_GROUP,))
+    response = await client.get("/api/v1/user/list", params={"cursor": cursor}, headers={"Authorization": admin_token})
+    assert response.status_code == 400
+
+
+async def test_user_export_requires_admin_group(client):
+    token = await sign_in(client)
+    response = await client.get("/api/v1/user/export", headers={"Authorization": token})
+    assert response.status_code == 403
+
+    admin_token = await sign_in(client, groups=(settings.ADMIN_GROUP,))
+    response = await client.get("/api/v1/user/export", params={"format": "csv"}, headers={"Authorization": admin_token})
+    assert response.status_code == 200
+    assert response.text.startswith("id,username,sub,name,email,email_verified")
+
+
+@pytest.mark.parametrize("path", ["/api/v1/metrics/auth", "/api/v1/metrics/cognito", "/api/v1/metrics/db"])
+async def test_metrics_require_admin_group(client, path):
+    response = await client.get(path)
+    assert response.status_code == 401
+
+    token = await sign_in(client)
+    response = await client.get(path, headers={"Authorization": token})
+    assert response.status_code == 403
+
+    admin_token = await sign_in(client, groups=(settings.ADMIN_GROUP,))
+    response = await client.get(path, headers={"Authorization": admin_token})
+    assert response.status_code == 200
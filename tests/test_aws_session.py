@@ -0,0 +1,13 @@
+from app.settings import settings
+from aws_wrapper.session import build_aws_session
+
+
+def test_session_uses_the_keys_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "AKIATEST")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "secret")
+
+    session = build_aws_session()
+    credentials = session.get_credentials()
+    assert (credentials.access_key, credentials.secret_key) == ("AKIATEST", "secret")
+    assert session.region_name == settings.REGION
+    assert session.client("ses").meta.region_name == settings.REGION
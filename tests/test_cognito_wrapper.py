@@ -0,0 +1,141 @@
+import pytest
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+
+from app.settings import settings
+from aws_wrapper import Cognito_wrapper as cognito_module
+from aws_wrapper.circuit_breaker import RetryBudget
+from aws_wrapper.Cognito_wrapper import AsyncCognitoWrapper, Cognito_wrapper, CognitoError
+
+pytestmark = pytest.mark.anyio
+
+
+class EchoWrapper:
+    def echo(self, value):
+        return value
+
+
+async def test_wrapper_can_start_again_after_shutdown():
+    wrapper = AsyncCognitoWrapper(max_workers=2, wrapper=EchoWrapper())
+    assert await wrapper.echo(1) == 1
+
+    wrapper.shutdown()
+    with pytest.raises(RuntimeError):
+        await wrapper.echo(2)
+
+    wrapper.start()
+    assert await wrapper.echo(3) == 3
+    wrapper.shutdown()
+
+
+def client_error(code: str, status_code: int = 400) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status_code}},
+                       "operation")
+
+
+class FakeCognitoClient:
+    """Raises the queued errors in order, then answers every call."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __getattr__(self, operation):
+        def call(**kwargs):
+            self.calls += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            return {"operation": operation}
+        return call
+
+
+@pytest.fixture
+def cognito(monkeypatch):
+    """Fresh breakers and retry budget, no backoff sleeps; returns a function installing a fake client."""
+    monkeypatch.setattr(cognito_module, "circuit_breakers", {})
+    monkeypatch.setattr(cognito_module, "retry_budget", RetryBudget(ratio=0.1, capacity=10))
+    monkeypatch.setattr(settings, "COGNITO_RETRY_BACKOFF_BASE", 0)
+    monkeypatch.setattr(settings, "COGNITO_BREAKER_FAILURE_THRESHOLD", 5)
+    monkeypatch.setattr(settings, "COGNITO_CALL_RETRIES", 2)
+
+    def install(*errors: Exception) -> FakeCognitoClient:
+        client = FakeCognitoClient(*errors)
+        monkeypatch.setattr(cognito_module, "get_cognito_client", lambda: client)
+        return client
+
+    return install
+
+
+def test_per_user_limit_is_not_an_outage(cognito):
+    client = cognito(*[client_error("LimitExceededException") for _ in range(10)])
+    wrapper = Cognito_wrapper()
+
+    for _ in range(10):
+        with pytest.raises(ClientError):
+            wrapper._call("forgot_password", Username="someone")
+
+    assert client.calls == 10
+    assert cognito_module.get_circuit_breaker("forgot_password").state == "closed"
+    assert cognito_module.retry_budget.retries == 0
+    assert wrapper._call("forgot_password", Username="someone else") == {"operation": "forgot_password"}
+
+
+@pytest.mark.parametrize("operation", ["sign_up", "forgot_password", "confirm_forgot_password"])
+def test_state_changing_call_is_not_sent_again_after_a_read_timeout(cognito, operation):
+    client = cognito(ReadTimeoutError(endpoint_url="https://cognito"))
+
+    with pytest.raises(ReadTimeoutError):
+        Cognito_wrapper()._call(operation)
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize("error", [
+    EndpointConnectionError(endpoint_url="https://cognito"),
+    ConnectTimeoutError(endpoint_url="https://cognito"),
+    client_error("TooManyRequestsException"),
+])
+def test_state_changing_call_is_retried_when_it_never_reached_cognito(cognito, error):
+    client = cognito(error)
+
+    assert Cognito_wrapper()._call("sign_up") == {"operation": "sign_up"}
+    assert client.calls == 2
+
+
+@pytest.mark.parametrize("error", [
+    ReadTimeoutError(endpoint_url="https://cognito"),
+    client_error("InternalErrorException", 500),
+])
+def test_read_only_call_is_retried_after_a_read_timeout_or_5xx(cognito, error):
+    client = cognito(error)
+
+    assert Cognito_wrapper()._call("get_user") == {"operation": "get_user"}
+    assert client.calls == 2
+
+
+def test_open_circuit_fails_fast(cognito):
+    client = cognito(*[client_error("InternalErrorException", 500) for _ in range(5)])
+    wrapper = Cognito_wrapper()
+
+    # three attempts each: the second call opens the circuit before its last retry
+    with pytest.raises(ClientError):
+        wrapper._call("get_user")
+    with pytest.raises(CognitoError):
+        wrapper._call("get_user")
+    assert client.calls == 5
+    assert cognito_module.get_circuit_breaker("get_user").state == "open"
+
+    with pytest.raises(CognitoError):
+        wrapper._call("get_user")
+    assert client.calls == 5
+    # the other operations have their own circuit
+    assert wrapper._call("initiate_auth") == {"operation": "initiate_auth"}
+
+
+def test_retries_stop_when_the_budget_is_spent(cognito, monkeypatch):
+    monkeypatch.setattr(cognito_module, "retry_budget", RetryBudget(ratio=0, capacity=1))
+    client = cognito(*[EndpointConnectionError(endpoint_url="https://cognito") for _ in range(3)])
+
+    with pytest.raises(EndpointConnectionError):
+        Cognito_wrapper()._call("sign_up")
+    # one retry from the budget, no second one
+    assert client.calls == 2
+    assert cognito_module.retry_budget.exhausted == 1
@@ -0,0 +1,36 @@
+import base64
+import json
+
+import pytest
+
+from app.services.utils import MAX_CURSOR_ID, UtilsService
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("last_id", [1, 42, 1000, MAX_CURSOR_ID])
+def test_cursor_round_trip(last_id):
+    cursor = UtilsService.encode_cursor(last_id)
+    assert "=" not in cursor
+    assert UtilsService.decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor({"id": True}),
+    raw_cursor({"id": 10**12}),
+    raw_cursor({"id": MAX_CURSOR_ID + 1}),
+    raw_cursor({"id": 0}),
+    raw_cursor({"id": -5}),
+    raw_cursor({"id": 1.5}),
+    raw_cursor({"id": "7"}),
+    raw_cursor({"id": None}),
+    raw_cursor({"last": 7}),
+    raw_cursor([7]),
+    raw_cursor("7"),
+    "not base64!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    assert UtilsService.decode_cursor(cursor) is None
@@ -0,0 +1,15 @@
+from sqlalchemy.pool import NullPool
+
+from app.db import engine_options
+
+
+def test_pgbouncer_mode_turns_every_statement_cache_off():
+    options = engine_options(pgbouncer_mode=True, prepared_statement_cache_size=100)
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    assert options["connect_args"]["statement_cache_size"] == 0
+
+
+def test_direct_mode_keeps_the_configured_statement_cache():
+    options = engine_options(pgbouncer_mode=False, prepared_statement_cache_size=100)
+    assert options["connect_args"]["prepared_statement_cache_size"] == 100
@@ -0,0 +1,84 @@
+from fastapi import FastAPI
+
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+
+from app.routers.api_router import api_router
+from app.utilities import auth
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_slow_jwks_download_does_not_block_other_requests(monkeypatch):
+    """While a token forces a slow JWKS download, other requests on the worker keep being served."""
+    delay = 1.0
+
+    async def slow_jwks(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"keys": []})
+
+    store = auth.JWKSStore(auth.keys_url, ttl=60)
+    store.client = httpx.AsyncClient(transport=httpx.MockTransport(slow_jwks))
+    monkeypatch.setattr(auth, "jwks_store", store)
+
+    app = FastAPI()
+    app.include_router(api_router)
+    token = jwt.encode({"username": "test"}, "x" * 32, algorithm="HS256", headers={"kid": "unknown"})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        protected = asyncio.create_task(client.get("/api/v1/user/profile", headers={"Authorization": token}))
+        await asyncio.sleep(0.05)
+
+        latencies = []
+        while not protected.done():
+            request_start = time.perf_counter()
+            response = await client.get("/api/v1/test/")
+            latencies.append(time.perf_counter() - request_start)
+            assert response.status_code == 200
+            await asyncio.sleep(0.01)
+
+    await store.client.aclose()
+    assert protected.result().status_code == 401
+    assert len(latencies) > 1
+    assert max(latencies) < delay / 2, "the event loop was blocked by the JWKS download"
+
+
+def counting_store(**options) -> tuple[auth.JWKSStore, list]:
+    """A store whose downloads go to a MockTransport that serves key `k1` and records each request."""
+    downloads = []
+
+    async def jwks(request: httpx.Request) -> httpx.Response:
+        downloads.append(request)
+        # keep the download in flight while the other lookups arrive
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"keys": [{"kid": "k1", "kty": "RSA"}]})
+
+    store = auth.JWKSStore(auth.keys_url, ttl=60, **options)
+    store.client = httpx.AsyncClient(transport=httpx.MockTransport(jwks))
+    return store, downloads
+
+
+async def test_concurrent_lookups_share_one_download():
+    store, downloads = counting_store()
+
+    keys = await asyncio.gather(*(store.get("k1") for _ in range(100)))
+
+    await store.client.aclose()
+    assert len(downloads) == 1
+    assert all(key == {"kid": "k1", "kty": "RSA"} for key in keys)
+
+
+async def test_kid_cached_as_unknown_causes_no_download():
+    # no refresh rate limit, so only the unknown-kid cache can stop the downloads
+    store, downloads = counting_store(min_refresh_interval=0)
+
+    assert await store.get("forged") is None
+    assert len(downloads) == 1
+
+    assert await asyncio.gather(*(store.get("forged") for _ in range(100))) == [None] * 100
+    await store.client.aclose()
+    assert len(downloads) == 1
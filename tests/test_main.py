@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+
+import importlib
+
+import pytest
+
+from app.settings import settings
+from app.utilities.auth import jwks_store
+from app.utilities.cognito import cognito_obj
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.__main__"])
+def test_app_starts_serves_and_shuts_down(module, monkeypatch):
+    monkeypatch.setattr(settings, "FRONTEND_URL", "https://app.example.com")
+    app = importlib.reload(importlib.import_module(module)).app
+
+    with TestClient(app) as client:
+        assert jwks_store.client is not None
+        assert client.get("/static/welcome.txt").status_code == 200
+        assert client.get("/api/v1/user/profile").status_code == 401
+
+        preflight = client.options("/api/v1/user/profile", headers={
+            "Origin": "https://app.example.com", "Access-Control-Request-Method": "GET",
+        })
+        assert preflight.headers["access-control-allow-origin"] == "https://app.example.com"
+
+    # shutdown closed the JWKS client and the Cognito thread pool
+    assert jwks_store.client is None
+    assert cognito_obj._shut_down
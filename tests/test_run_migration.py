@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import run_migration as migration
+from app.db import direct_url
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def direct_engine(database):
+    direct_engine = create_async_engine(direct_url, poolclass=NullPool)
+    yield direct_engine
+    await direct_engine.dispose()
+
+
+async def test_database_at_head_is_left_alone(direct_engine):
+    await migration.run_migration()
+
+    async with direct_engine.connect() as connection:
+        heads = set(migration.ScriptDirectory.from_config(migration.alembic_config()).get_heads())
+        assert await connection.run_sync(migration.current_revisions) == heads
+
+
+async def test_waiting_for_the_lock_gives_up_after_the_timeout(direct_engine):
+    async with direct_engine.connect() as holder, direct_engine.connect() as waiter:
+        await holder.execution_options(isolation_level="AUTOCOMMIT")
+        await waiter.execution_options(isolation_level="AUTOCOMMIT")
+        await holder.execute(text("SELECT pg_advisory_lock(:key)"), {"key": migration.MIGRATION_LOCK_KEY})
+        try:
+            with pytest.raises(migration.MigrationLockTimeout):
+                await migration.acquire_migration_lock(waiter, timeout=1)
+        finally:
+            await holder.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": migration.MIGRATION_LOCK_KEY})
+
+        await migration.acquire_migration_lock(waiter, timeout=1)
+        await waiter.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": migration.MIGRATION_LOCK_KEY})
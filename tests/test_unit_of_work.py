@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, event, exc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.daos.user import UserDao
+from app.db import AsyncSessionFactory, get_session
+from app.models.user import User
+from app.utilities.unit_of_work import UnitOfWorkRoute
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "uow-test-"
+
+
+def new_user(sub: str | None = None) -> dict:
+    username = PREFIX + uuid.uuid4().hex[:12]
+    return {"username": username, "sub": sub or str(uuid.uuid4()), "name": "test", "email": f"{username}@example.com"}
+
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+@router.post("/two")
+async def create_two(subs: list[str], session: AsyncSession = Depends(get_session)):
+    for sub in subs:
+        await UserDao(session).create(new_user(sub))
+    return {"success": True}
+
+
+@router.post("/rejected")
+async def create_then_reject(subs: list[str], session: AsyncSession = Depends(get_session)):
+    await UserDao(session).create(new_user(subs[0]))
+    raise HTTPException(status_code=400, detail="rejected after the write")
+
+
+@router.post("/crash")
+async def create_then_crash(subs: list[str], session: AsyncSession = Depends(get_session)):
+    await UserDao(session).create(new_user(subs[0]))
+    raise RuntimeError("failed after the write")
+
+
+@router.post("/duplicate")
+async def create_duplicate(subs: list[str], session: AsyncSession = Depends(get_session)):
+    await UserDao(session).create(new_user(subs[0]))
+    try:
+        await UserDao(session).create(new_user(subs[0]))
+    except exc.IntegrityError:
+        return JSONResponse({"success": False, "message": "duplicate"}, status_code=400)
+    return {"success": True}
+
+
+@pytest.fixture
+async def client(database):
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+    async with AsyncSessionFactory() as session:
+        await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+        await session.commit()
+
+
+@pytest.fixture
+def commits():
+    counted = []
+
+    def count(session):
+        if session.info.get("unit_of_work"):
+            counted.append(session)
+
+    event.listen(Session, "after_commit", count)
+    yield counted
+    event.remove(Session, "after_commit", count)
+
+
+async def stored_subs(subs: list[str]) -> set[str]:
+    async with AsyncSessionFactory() as session:
+        return set(await session.scalars(select(User.sub).where(User.sub.in_(subs))))
+
+
+async def test_request_commits_once(client, commits):
+    subs = [str(uuid.uuid4()), str(uuid.uuid4())]
+    response = await client.post("/two", json=subs)
+
+    assert response.status_code == 200
+    assert len(commits) == 1
+    assert await stored_subs(subs) == set(subs)
+
+
+@pytest.mark.parametrize("path, status_code", [("/rejected", 400), ("/crash", 500)])
+async def test_error_after_a_write_leaves_no_row(client, commits, path, status_code):
+    subs = [str(uuid.uuid4())]
+    response = await client.post(path, json=subs)
+
+    assert response.status_code == status_code
+    assert commits == []
+    assert await stored_subs(subs) == set()
+
+
+async def test_handled_flush_failure_is_rolled_back(client, commits):
+    subs = [str(uuid.uuid4())]
+    response = await client.post("/duplicate", json=subs)
+
+    assert response.status_code == 400
+    assert commits == []
+    assert await stored_subs(subs) == set()
@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.daos.user import UserDao
+from app.db import AsyncSessionFactory
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "bulk-test-"
+
+
+def new_user(**values) -> dict:
+    username = PREFIX + uuid.uuid4().hex[:12]
+    return {"username": username, "sub": str(uuid.uuid4()), "name": "test", "email": f"{username}@example.com",
+            **values}
+
+
+async def users_by_sub(subs: list[str]) -> dict[str, User]:
+    async with AsyncSessionFactory() as session:
+        users = await session.scalars(select(User).where(User.sub.in_(subs)))
+        return {user.sub: user for user in users}
+
+
+@pytest.fixture
+async def cleanup(database):
+    yield
+    async with AsyncSessionFactory() as session:
+        await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+        await session.commit()
+
+
+async def test_create_many_inserts_in_chunks_and_skips_existing_subs(cleanup):
+    users = [new_user() for _ in range(5)]
+    async with AsyncSessionFactory() as session:
+        ids = await UserDao(session).create_many(users, chunk_size=2)
+    assert len(set(ids)) == 5
+
+    existing = dict(users[0], name="changed")
+    async with AsyncSessionFactory() as session:
+        ids = await UserDao(session).create_many([existing, new_user()])
+    assert len(ids) == 1
+    assert (await users_by_sub([existing["sub"]]))[existing["sub"]].name == "test"
+
+
+async def test_upsert_many_updates_a_user_whose_sub_exists(cleanup):
+    user = new_user()
+    async with AsyncSessionFactory() as session:
+        [user_id] = await UserDao(session).create_many([user])
+
+    changed = dict(user, name="changed", email_verified=True)
+    other = new_user()
+    async with AsyncSessionFactory() as session:
+        ids = await UserDao(session).upsert_many([changed, other], chunk_size=1)
+
+    assert user_id in ids
+    assert len(ids) == 2
+    stored = await users_by_sub([user["sub"], other["sub"]])
+    assert stored[user["sub"]].id == user_id
+    assert (stored[user["sub"]].name, stored[user["sub"]].email_verified) == ("changed", True)
+    assert other["sub"] in stored
+
+
+async def test_upsert_many_keeps_the_last_row_per_sub(cleanup):
+    user = new_user()
+    async with AsyncSessionFactory() as session:
+        ids = await UserDao(session).upsert_many([dict(user, name="first"), dict(user, name="last")])
+
+    assert len(ids) == 1
+    assert (await users_by_sub([user["sub"]]))[user["sub"]].name == "last"
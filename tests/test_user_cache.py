@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.daos import user as user_dao_module
+from app.daos.user import UserDao, user_cache
+from app.db import AsyncSessionFactory
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user(database):
+    username = "cache-test-" + uuid.uuid4().hex[:12]
+    async with AsyncSessionFactory() as session:
+        await UserDao(session).create({
+            "username": username, "sub": str(uuid.uuid4()), "name": "test", "email": f"{username}@example.com",
+        })
+    user_cache.clear()
+
+    yield username
+
+    async with AsyncSessionFactory() as session:
+        await session.execute(delete(User).where(User.username == username))
+        await session.commit()
+
+
+def unit_of_work_session():
+    session = AsyncSessionFactory()
+    session.info["unit_of_work"] = True
+    return session
+
+
+async def test_invalidation_waits_for_the_commit(user):
+    async with unit_of_work_session() as writer:
+        await UserDao(writer).update_email_verified(user)
+
+        # a concurrent request still sees, and caches, the committed row
+        async with AsyncSessionFactory() as reader:
+            assert (await UserDao(reader).get_by_username(user)).email_verified is False
+        assert user_cache.get("username", user) is not None
+
+        await writer.commit()
+
+    assert user_cache.get("username", user) is None
+    async with AsyncSessionFactory() as reader:
+        assert (await UserDao(reader).get_by_username(user)).email_verified is True
+
+
+async def test_row_read_before_an_invalidation_is_not_cached(user):
+    generation = user_cache.generation
+    async with unit_of_work_session() as writer:
+        await UserDao(writer).update_email_verified(user)
+        await writer.commit()
+
+    user_cache.set({key: "stale" for key in user_cache.KEYS}, generation)
+    assert user_cache.get("username", "stale") is None
+
+
+async def test_session_that_wrote_reads_its_own_rows(user):
+    async with AsyncSessionFactory() as reader:
+        await UserDao(reader).get_by_username(user)
+
+    async with unit_of_work_session() as writer:
+        user_dao = UserDao(writer)
+        await user_dao.update_email_verified(user)
+        assert (await user_dao.get_by_username(user)).email_verified is True
+        await writer.rollback()
+
+    # the rollback dropped the queued invalidation, the cached committed row stays
+    assert user_cache.get("username", user)["email_verified"] is False
+
+
+async def test_replica_reads_are_not_cached_right_after_a_write(user, monkeypatch):
+    monkeypatch.setattr(user_dao_module, "reads_from_replica", lambda session: True)
+    async with unit_of_work_session() as writer:
+        await UserDao(writer).update_email_verified(user)
+        await writer.commit()
+
+    async with AsyncSessionFactory() as reader:
+        assert await UserDao(reader).get_by_username(user) is not None
+    assert user_cache.get("username", user) is None
+
+
+async def test_uncached_read_sees_a_change_made_by_another_worker(user):
+    email = f"{user}@example.com"
+    async with AsyncSessionFactory() as reader:
+        await UserDao(reader).get_by_email(email)
+
+    # another worker's write: committed without touching this process's cache
+    async with AsyncSessionFactory() as writer:
+        await writer.execute(update(User).where(User.username == user).values(email_verified=True))
+        await writer.commit()
+
+    async with AsyncSessionFactory() as reader:
+        assert (await UserDao(reader).get_by_email(email)).email_verified is False
+        assert (await UserDao(reader).get_by_email(email, cached=False)).email_verified is True
+    # the fresh row replaced this worker's stale entry
+    assert user_cache.get("email", email)["email_verified"] is True
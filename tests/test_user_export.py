@@ -0,0 +1,56 @@
+import tracemalloc
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.db import AsyncSessionFactory
+from app.models.user import User
+from app.services.user import UserService
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "export-test-"
+
+
+async def seed(count: int) -> None:
+    rows = []
+    for _ in range(count):
+        username = PREFIX + uuid.uuid4().hex[:12]
+        rows.append({
+            "username": username, "sub": str(uuid.uuid4()), "name": "test",
+            "email": f"{username}@example.com", "email_verified": True,
+        })
+    async with AsyncSessionFactory() as session:
+        await session.execute(insert(User), rows)
+        await session.commit()
+
+
+async def export_peak() -> tuple[int, int]:
+    response = await UserService.export_users("ndjson")
+    exported = 0
+    tracemalloc.start()
+    try:
+        async for chunk in response.body_iterator:
+            exported += chunk.count("\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return exported, peak
+
+
+async def test_export_memory_stays_flat_as_the_table_grows(database):
+    """The export streams from a server-side cursor, so its peak memory does not grow with the table."""
+    results = []
+    try:
+        for _ in range(3):
+            await seed(5000)
+            results.append(await export_peak())
+    finally:
+        async with AsyncSessionFactory() as session:
+            await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+            await session.commit()
+
+    (first_count, first_peak), (last_count, last_peak) = results[0], results[-1]
+    assert last_count >= first_count + 10000
+    assert last_peak < first_peak * 1.5
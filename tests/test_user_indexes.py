@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import text
+
+from app.daos.user import UserDao, user_cache
+from app.db import AsyncSessionFactory, engine
+
+pytestmark = pytest.mark.anyio
+
+
+class CapturingSession:
+    """Stands in for the session to capture the statement a DAO method builds."""
+
+    def __init__(self) -> None:
+        self.statement = None
+        self.info = {}
+
+    async def scalar(self, statement):
+        self.statement = statement
+
+
+@pytest.mark.parametrize("method, index_name, argument", [
+    ("get_by_email", "ix_user_lower_email", "Person@Example.com"),
+    ("get_by_username", "ix_user_username", "person-ab12"),
+])
+async def test_user_lookup_uses_its_index(database, method, index_name, argument):
+    # an empty cache makes the lookup build and run its statement
+    user_cache.clear()
+    capture = CapturingSession()
+    await getattr(UserDao(capture), method)(argument)
+    compiled = capture.statement.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+
+    async with AsyncSessionFactory() as session:
+        # with sequential scans off the plan shows whether the index can serve the query at all,
+        # even while the table is still small
+        await session.execute(text("SET enable_seqscan = off"))
+        plan = "\n".join((await session.execute(text(f"EXPLAIN {compiled}"))).scalars())
+
+    assert index_name in plan, plan